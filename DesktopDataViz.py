@@ -1,46 +1,28 @@
 import sys
-import pandas as pd
-import plotly.express as px
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QFileDialog, QLabel,
-    QComboBox, QTableView, QMessageBox, QHBoxLayout, QListWidget, QListWidgetItem,
-    QAbstractItemView , QFrame, QSizePolicy
+    QComboBox, QTableView, QMessageBox, QHBoxLayout, QFrame, QProgressBar, QLineEdit, QCheckBox
 )
-from PySide6.QtCore import Qt, QAbstractTableModel, QUrl
-from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtGui import QIcon
-import sys
+from PySide6.QtCore import Qt, QTimer, QFileSystemWatcher, QEvent, QCoreApplication, Signal
+from PySide6.QtGui import QIcon, QKeySequence, QShortcut
 import os
+from datetime import date
+from chart_modes import CHART_MODES, MODE_LABELS
+from desktop_perf import PerformancePanel
+from desktop_workers import JobChannel
+from timing import StageTimer
+from xlsx_parts import changed_sheets, sheet_part_hashes, workbook_version
 
 
 
-class PandasModel(QAbstractTableModel):
-    def __init__(self, df=pd.DataFrame(), parent=None):
-        super().__init__(parent)
-        self._df = df
-        
-
-    def rowCount(self, parent=None):
-        return len(self._df.index)
-
-    def columnCount(self, parent=None):
-        return len(self._df.columns)
-
-    def data(self, index, role=Qt.DisplayRole):
-        if index.isValid() and role == Qt.DisplayRole:
-            return str(self._df.iat[index.row(), index.column()])
-        return None
-
-    def headerData(self, section, orientation, role=Qt.DisplayRole):
-        if role == Qt.DisplayRole:
-            if orientation == Qt.Horizontal:
-                return str(self._df.columns[section])
-            else:
-                return str(self._df.index[section])
-        return None
-
+# Only Qt widgets and light modules are imported at startup. pandas, plotly and
+# the analysis modules are imported once a file is opened, and the web engine
+# behind the chart is created right after the window's first paint.
 
 class FluctuationApp(QWidget):
+    # Emitted once the chart view has been created (or failed to be)
+    chart_view_ready = Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -125,6 +107,33 @@ class FluctuationApp(QWidget):
         """)
         self.load_btn.clicked.connect(self.load_file)
         self.header.addWidget(self.load_btn)
+
+        # Re-read the workbook when it is saved again; only changed sheets are re-parsed
+        self.auto_reload_check = QCheckBox("Auto-reload on change")
+        self.auto_reload_check.setChecked(True)
+        self.header.addWidget(self.auto_reload_check)
+
+        # Parse all sheets in worker processes after a file is opened
+        self.prefetch_check = QCheckBox("Prefetch all sheets")
+        self.prefetch_check.toggled.connect(self.start_prefetch)
+        self.header.addWidget(self.prefetch_check)
+
+        # Snapshot history of analyzed sheets (trend and newly critical parts)
+        self.history_btn = QPushButton("📅 History")
+        self.history_btn.clicked.connect(self.open_history)
+        self.header.addWidget(self.history_btn)
+
+        # What-if sweep over thresholds and frozen-zone lengths
+        self.sweep_btn = QPushButton("🔬 What-if")
+        self.sweep_btn.clicked.connect(self.open_sweep)
+        self.header.addWidget(self.sweep_btn)
+
+        # Performance debug panel toggle (also F12)
+        self.perf_btn = QPushButton("⏱ Performance")
+        self.perf_btn.setCheckable(True)
+        self.perf_btn.toggled.connect(self.toggle_performance_panel)
+        self.header.addWidget(self.perf_btn)
+        QShortcut(QKeySequence("F12"), self, activated=self.perf_btn.toggle)
         self.main_layout.addLayout(self.header)
 
         # Control panel frame
@@ -152,7 +161,39 @@ class FluctuationApp(QWidget):
         self.control_layout.addSpacing(20)
         self.control_layout.addWidget(QLabel("Project:"))
         self.control_layout.addWidget(self.project_combo)
+
+        # Chart rendering mode (per-material lines, packed WebGL or envelope)
+        self.chart_mode_combo = QComboBox()
+        for mode in CHART_MODES:
+            self.chart_mode_combo.addItem(MODE_LABELS[mode], mode)
+        self.chart_mode_combo.currentIndexChanged.connect(self.update_project_selection)
+        self.control_layout.addSpacing(20)
+        self.control_layout.addWidget(QLabel("Chart:"))
+        self.control_layout.addWidget(self.chart_mode_combo)
+
+        # Weekly peaks of all projects instead of the selected project's materials
+        self.overview_check = QCheckBox("All projects overview")
+        self.overview_check.toggled.connect(self.update_project_selection)
+        self.control_layout.addWidget(self.overview_check)
         self.control_layout.addStretch()
+
+        # Sheet parsing progress, only visible while a sheet is being read
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(250)
+        self.load_progress.setVisible(False)
+        self.control_layout.addWidget(self.load_progress)
+
+        # Shown when value cells could not be read as numbers; the tooltip lists examples
+        self.parse_warning = QLabel()
+        self.parse_warning.setStyleSheet("color: #b45309;")
+        self.parse_warning.setVisible(False)
+        self.control_layout.addWidget(self.parse_warning)
+
+        # Failures of background work that must not interrupt the analysis; the tooltip has the details
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #b91c1c;")
+        self.status_label.setVisible(False)
+        self.control_layout.addWidget(self.status_label)
         
         self.main_layout.addWidget(self.control_frame)
 
@@ -218,15 +259,45 @@ class FluctuationApp(QWidget):
         self.chart_layout = QVBoxLayout(self.chart_frame)
         self.chart_layout.addWidget(QLabel("Fluctuation Visualization"))
         
-        self.chart_view = QWebEngineView()
-        self.chart_view.setMinimumHeight(500)
-        self.chart_layout.addWidget(self.chart_view)
+        # Local plotly.js page loaded once; figures are pushed into it with Plotly.react.
+        # A placeholder holds its place until warm_up_chart_view creates it.
+        self.chart_view = None
+        self.pending_figure = None
+        self.chart_placeholder = QLabel("Preparing chart view...")
+        self.chart_placeholder.setAlignment(Qt.AlignCenter)
+        self.chart_placeholder.setMinimumHeight(500)
+        self.chart_layout.addWidget(self.chart_placeholder)
         self.main_layout.addWidget(self.chart_frame)
+        self.first_paint_done = False
 
         # Table section
         self.table_frame = QFrame()
         self.table_layout = QVBoxLayout(self.table_frame)
-        self.table_layout.addWidget(QLabel("Critical Parts Details"))
+        self.table_header = QHBoxLayout()
+        self.table_header.addWidget(QLabel("Critical Parts Details"))
+        self.table_header.addStretch()
+        self.table_filter = QLineEdit()
+        self.table_filter.setPlaceholderText("Filter project, part number or week...")
+        self.table_filter.setClearButtonEnabled(True)
+        self.table_filter.setMinimumWidth(280)
+        self.table_header.addWidget(self.table_filter)
+
+        # Export of the rows shown (filter and sort applied) plus a per-project summary
+        self.export_progress = QProgressBar()
+        self.export_progress.setMaximumWidth(150)
+        self.export_progress.setVisible(False)
+        self.table_header.addWidget(self.export_progress)
+        self.export_btn = QPushButton("💾 Export...")
+        self.export_btn.clicked.connect(self.export_table)
+        self.table_header.addWidget(self.export_btn)
+        self.table_layout.addLayout(self.table_header)
+
+        # Filtering is debounced so typing does not re-filter on every key
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_table_filter)
+        self.table_filter.textChanged.connect(lambda _text: self.filter_timer.start())
         
         self.critical_table = QTableView()
         self.critical_table.setStyleSheet("""
@@ -238,12 +309,116 @@ class FluctuationApp(QWidget):
             }
         """)
         self.critical_table.horizontalHeader().setDefaultAlignment(Qt.AlignLeft)
+        # Rows keep sheet order until a header is clicked; sorting happens inside the model
+        self.critical_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.critical_table.setSortingEnabled(True)
         self.table_layout.addWidget(self.critical_table)
         self.main_layout.addWidget(self.table_frame)
 
+        self.perf_panel = PerformancePanel()
+        self.perf_panel.setVisible(False)
+        self.main_layout.addWidget(self.perf_panel)
+
+        # Background jobs: one lane for sheet parsing, one for per-project views
+        self.sheet_jobs = JobChannel(parent=self)
+        self.sheet_jobs.progress.connect(self.report_load_progress)
+        self.sheet_jobs.finished.connect(self.on_sheet_loaded)
+        self.sheet_jobs.failed.connect(self.on_sheet_failed)
+        self.project_jobs = JobChannel(parent=self)
+        self.project_jobs.finished.connect(self.on_project_view_ready)
+        self.project_jobs.failed.connect(self.on_project_view_failed)
+        self.reload_jobs = JobChannel(parent=self)
+        self.reload_jobs.finished.connect(self.on_file_reloaded)
+        self.reload_jobs.failed.connect(self.on_reload_failed)
+        # One channel per sheet, so saving one sheet does not drop another's pending save
+        self.history_jobs = {}
+        self.export_jobs = JobChannel(parent=self)
+        self.export_jobs.progress.connect(self.report_export_progress)
+        self.export_jobs.finished.connect(self.on_export_done)
+        self.export_jobs.failed.connect(self.on_export_failed)
+
+        # Excel writes a file in several steps, so reloads wait for the saves to settle
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.schedule_reload)
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(1000)
+        self.reload_timer.timeout.connect(self.reload_file)
+
         # Data storage
+        self.file_path = None
         self.df = None
+        self.sheet_index = None
         self.current_sheet_df = None
+        self.sheet_timer = None
+        self.project_timer = None
+        self.reload_stage_timer = None
+        # Per-sheet part hashes of the loaded file, parsed sheets and rendered
+        # charts keyed by (sheet, project, chart mode); a reload only drops
+        # the entries of sheets and projects that changed
+        self.part_hashes = {}
+        self.sheet_indexes = {}
+        self.chart_cache = {}
+        self.pending_chart_key = None
+        # Prefetched frames are keyed by the workbook version and bounded by the cache size
+        self.prefetcher = None
+        self.workbook_digest = None
+        # Every loaded sheet is saved as a snapshot dated by the file's modification time
+        self.history_store = None
+        self.history_dialog = None
+        self.sweep_dialog = None
+        # Snapshot ids by (file, sheet, sheet content hash); saves in flight by sheet
+        self.snapshot_ids = {}
+        self.saving_snapshots = {}
+
+    def event(self, event):
+        # The web engine is the slowest part of startup, so it is only created
+        # once the window has been painted
+        if event.type() == QEvent.Paint and not self.first_paint_done:
+            self.first_paint_done = True
+            QTimer.singleShot(0, self.warm_up_chart_view)
+        return super().event(event)
+
+    def warm_up_chart_view(self):
+        try:
+            from desktop_chart import PlotlyView
+            chart_view = PlotlyView()
+        except ImportError as e:
+            self.chart_placeholder.setText(f"Chart view unavailable:\n{e}")
+            self.chart_view_ready.emit()
+            return
+        chart_view.setMinimumHeight(500)
+        self.chart_layout.replaceWidget(self.chart_placeholder, chart_view)
+        self.chart_placeholder.deleteLater()
+        self.chart_view = chart_view
+        if self.pending_figure is not None:
+            figure_json, self.pending_figure = self.pending_figure, None
+            self.chart_view.show_figure(figure_json)
+        self.chart_view_ready.emit()
+
+    def show_chart(self, figure_json):
+        if self.chart_view is None:
+            self.pending_figure = figure_json
+        else:
+            self.chart_view.show_figure(figure_json)
+
+    def clear_chart(self):
+        self.pending_figure = None
+        if self.chart_view is not None:
+            self.chart_view.clear()
+
+    def get_history_store(self):
+        if self.history_store is None:
+            from history import HistoryStore
+            self.history_store = HistoryStore()
+        return self.history_store
+
+    def get_prefetcher(self):
+        if self.prefetcher is None:
+            from excel_cache import SheetCache
+            from prefetch import SheetPrefetcher
+            self.prefetcher = SheetPrefetcher(SheetCache())
+        return self.prefetcher
 
     def load_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -255,127 +430,491 @@ class FluctuationApp(QWidget):
             return
 
         try:
-            self.xls = pd.ExcelFile(file_path)
+            from excel_reader import sheet_names
+            names = sheet_names(file_path)
+            part_hashes = sheet_part_hashes(file_path)
+            if self.file_path:
+                self.file_watcher.removePath(self.file_path)
+            self.file_path = file_path
+            self.part_hashes = part_hashes
+            self.workbook_digest = workbook_version(part_hashes)
+            self.sheet_indexes = {}
+            self.chart_cache = {}
+            self.show_status(None)
+            self.file_watcher.addPath(file_path)
             self.sheet_combo.clear()
-            self.sheet_combo.addItems(self.xls.sheet_names)
+            self.sheet_combo.addItems(names)
+            self.start_prefetch()
             # Show success message
             QMessageBox.information(
                 self, 
                 "Success", 
-                f"File loaded successfully with {len(self.xls.sheet_names)} sheets."
+                f"File loaded successfully with {len(names)} sheets."
             )
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to load Excel file:\n{e}")
 
     def load_sheet_data(self):
-        if not self.xls or self.sheet_combo.currentIndex() < 0:
+        if not self.file_path or self.sheet_combo.currentIndex() < 0:
             return
         sheet = self.sheet_combo.currentText()
-        try:
-            df = pd.read_excel(self.xls, sheet_name=sheet)
-            self.df = df
-            if 'Production line' not in df.columns:
-                QMessageBox.warning(self, "Error", "Sheet missing 'Production line' column.")
-                self.project_combo.clear()
-                return
-
-            projects = sorted(df['Production line'].dropna().unique())
+        # A new sheet makes any pending project computation stale
+        self.project_jobs.cancel()
+        self.sheet_timer = StageTimer("desktop", file=os.path.basename(self.file_path), sheet=sheet)
+        if sheet in self.sheet_indexes:
+            self.sheet_jobs.cancel()
+            self.on_sheet_loaded(self.sheet_indexes[sheet])
+            return
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        prefetcher = self.get_prefetcher() if self.prefetch_check.isChecked() else None
+        self.sheet_jobs.submit(
+            load_sheet, self.file_path, sheet, timer=self.sheet_timer,
+            prefetcher=prefetcher, digest=self.workbook_digest
+        )
+
+    def start_prefetch(self):
+        if not self.file_path or not self.prefetch_check.isChecked():
+            return
+        # The visible sheet goes first; sheets that already have an index need no frame
+        names = [name for name in self.part_hashes if name not in self.sheet_indexes]
+        if len(names) > 1:
+            self.get_prefetcher().prefetch(
+                self.file_path, names, self.workbook_digest, first=self.sheet_combo.currentText()
+            )
+
+    def report_load_progress(self, rows_read, total_rows):
+        if total_rows:
+            self.load_progress.setMaximum(total_rows)
+            self.load_progress.setValue(min(rows_read, total_rows))
+        else:
+            self.load_progress.setMaximum(0)
+
+    def on_sheet_loaded(self, loaded):
+        self.load_progress.setVisible(False)
+        self.df = None
+        self.sheet_index = None
+        if loaded is None:
+            QMessageBox.warning(self, "Error", "Sheet missing 'Production line' column.")
             self.project_combo.clear()
-            self.project_combo.addItems(projects)
-            self.project_combo.setCurrentIndex(0)
-            self.update_project_selection()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to load sheet data:\n{e}")
+            self.clear_chart()
+            return
+
+        self.sheet_indexes[self.sheet_combo.currentText()] = loaded
+        self.show_sheet_index(loaded, self.sheet_timer)
+        self.record_timings("sheet", self.sheet_timer)
+
+        self.project_combo.blockSignals(True)
+        self.project_combo.clear()
+        self.project_combo.addItems(self.sheet_index.projects)
+        self.project_combo.setCurrentIndex(0)
+        self.project_combo.blockSignals(False)
+        self.update_project_selection()
+
+    def show_sheet_index(self, sheet_index, timer):
+        from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS
+        from normalize import unparsed_cells
+        self.sheet_index = sheet_index
+        self.df = sheet_index.df
+
+        n_unparsed, examples = unparsed_cells(self.df)
+        self.parse_warning.setVisible(bool(n_unparsed))
+        if n_unparsed:
+            self.parse_warning.setText(f"⚠️ {n_unparsed:,} cells could not be read as numbers")
+            self.parse_warning.setToolTip("\n".join(
+                f"{row.Column} row {row.Row}: {row.Value!r}" for row in examples.itertuples()
+            ))
+
+        # The critical parts section covers all projects, so it only changes with the sheet
+        critical = self.sheet_index.critical(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+        with timer.span("apply_metrics_table", rows=len(critical.data)):
+            # Read from the project x week cube, not recomputed from the critical rows
+            metrics = self.sheet_index.metrics(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+            self.metric_critical_parts.setText(f"Critical Parts: {metrics['critical_parts']}")
+            self.metric_projects_affected.setText(f"Projects Affected: {metrics['projects_affected']}")
+            self.metric_highest_fluctuation.setText(f"Highest Fluctuation: {metrics['highest_fluctuation']:.1%}")
+            self.metric_affected_weeks.setText(f"Affected Weeks: {metrics['affected_weeks']}")
+            self.set_critical_table(critical.data)
+        self.save_snapshot(sheet_index)
+        if self.sweep_dialog is not None and self.sweep_dialog.isVisible():
+            self.sweep_dialog.set_sheet_index(sheet_index, self.sheet_combo.currentText())
+
+    def set_critical_table(self, critical_data):
+        from desktop_table import ColumnarTableModel
+        table = critical_data[['Production line', 'Material', 'Week', 'Fluctuation']]
+        model = ColumnarTableModel.from_frame(table, formatters={'Fluctuation': '{:.1%}'.format})
+        self.critical_table.setModel(model)
+        self.critical_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.apply_table_filter()
+
+    def apply_table_filter(self):
+        model = self.critical_table.model()
+        if model is not None:
+            model.set_filter(self.table_filter.text())
+
+    def export_table(self):
+        model = self.critical_table.model()
+        if model is None or not model.total_rows:
+            QMessageBox.information(self, "Info", "There are no critical parts to export.")
+            return
+        stem = os.path.splitext(os.path.basename(self.file_path))[0]
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Critical Parts", f"{stem} - {self.sheet_combo.currentText()} critical.xlsx",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
+        )
+        if not path:
+            return
+        columns, rows = model.visible_columns()
+        self.export_progress.setMaximum(len(rows))
+        self.export_progress.setValue(0)
+        self.export_progress.setVisible(True)
+        self.export_jobs.submit(export_rows, path, columns, rows)
+
+    def report_export_progress(self, done, total):
+        self.export_progress.setValue(min(done, total))
+
+    def on_export_done(self, exported):
+        paths, n_rows = exported
+        self.export_progress.setVisible(False)
+        QMessageBox.information(self, "Export", f"Exported {n_rows:,} rows to:\n" + "\n".join(paths))
+
+    def on_export_failed(self, message):
+        self.export_progress.setVisible(False)
+        QMessageBox.warning(self, "Error", f"Export failed:\n{message}")
+
+    def on_sheet_failed(self, message):
+        self.load_progress.setVisible(False)
+        QMessageBox.warning(self, "Error", f"Failed to load sheet data:\n{message}")
 
     def update_project_selection(self):
-        if self.df is None:
+        if self.sheet_index is None:
             return
         project = self.project_combo.currentText()
         if not project:
             return
-
-        df_selected = self.df[self.df['Production line'] == project].copy()
-        wk_cols = [col for col in df_selected.columns if col.lower().startswith('wk')]
-        if not wk_cols:
+        if not self.sheet_index.wk_cols:
             QMessageBox.information(self, "Info", "No week columns found starting with 'wk'.")
             return
+        # Submitting cancels whatever was still running for a previous project
+        mode = self.chart_mode_combo.currentData()
+        sheet = self.sheet_combo.currentText()
+        overview = self.overview_check.isChecked()
+        key = (sheet, None, 'overview') if overview else (sheet, project, mode)
+        if key in self.chart_cache:
+            self.project_jobs.cancel()
+            self.show_chart(self.chart_cache[key])
+            return
+        self.pending_chart_key = key
+        self.project_timer = StageTimer(
+            "desktop", file=os.path.basename(self.file_path), sheet=sheet, project=None if overview else project
+        )
+        if overview:
+            self.project_jobs.submit(build_overview_chart, self.sheet_index, timer=self.project_timer)
+            return
+        self.project_jobs.submit(
+            build_project_chart, self.sheet_index, project, mode, timer=self.project_timer
+        )
 
+    def on_project_view_ready(self, figure_json):
+        self.chart_cache[self.pending_chart_key] = figure_json
+        with self.project_timer.span("apply_chart"):
+            self.show_chart(figure_json)
+        self.record_timings("project", self.project_timer)
 
-        df_long = df_selected.melt(
-            id_vars=['Material', 'Production line', 'Deficit quantity'],
-            value_vars=wk_cols,
-            var_name='Week',
-            value_name='Fluctuation'
-        )
-        deficit_rows = df_selected[['Material', 'Production line', 'Deficit quantity']].copy()
-        deficit_rows['Week'] = 'Deficit'
-        deficit_rows['Fluctuation'] = deficit_rows['Deficit quantity']
-        df_long = pd.concat([deficit_rows, df_long], ignore_index=True)
-
-        week_order = ['Deficit'] + wk_cols
-        df_long['Week'] = pd.Categorical(df_long['Week'], categories=week_order, ordered=True)
-        df_long = df_long.sort_values(['Material', 'Week'])
-
-
-        fig = px.line(
-            df_long,
-            x='Week',
-            y='Fluctuation',
-            color='Material',
-            markers=True,
-            title=f"Fluctuation Over Weeks - {project}",
-            hover_data=['Deficit quantity'],
-            height=600,
-            width=1100
+    def record_timings(self, pipeline, timer):
+        self.perf_panel.show_timer(pipeline, timer)
+        timer.flush()
+
+    def toggle_performance_panel(self, visible):
+        self.perf_panel.setVisible(visible)
+
+    def on_project_view_failed(self, message):
+        QMessageBox.warning(self, "Error", f"Failed to update project view:\n{message}")
+
+    def schedule_reload(self, path):
+        if path != self.file_path or not self.auto_reload_check.isChecked():
+            return
+        self.reload_timer.start()
+
+    def reload_file(self):
+        if not self.file_path or not os.path.exists(self.file_path):
+            return
+        # Saving through a temporary file replaces the watched file, which drops the watch
+        if self.file_path not in self.file_watcher.files():
+            self.file_watcher.addPath(self.file_path)
+
+        sheet = self.sheet_combo.currentText()
+        self.reload_stage_timer = StageTimer("desktop", file=os.path.basename(self.file_path), sheet=sheet)
+        self.reload_jobs.submit(
+            reload_workbook, self.file_path, self.part_hashes, sheet, self.sheet_indexes.get(sheet),
+            timer=self.reload_stage_timer
         )
 
-        fig.add_hline(y=0.2, line_dash="dash", line_color="red")
-        fig.add_hline(y=-0.2, line_dash="dash", line_color="red")
+    def on_file_reloaded(self, result):
+        self.show_status(None)
+        self.part_hashes = result['part_hashes']
+        changed = set(result['changed_sheets']) | set(result['removed_sheets'])
+        if not changed:
+            return
+        self.workbook_digest = workbook_version(self.part_hashes)
 
+        sheet = result['sheet']
+        # Other sheets are re-parsed the next time they are selected
+        for name in changed - {sheet}:
+            self.sheet_indexes.pop(name, None)
+            self.drop_charts(lambda key: key[0] == name)
 
-        if len(wk_cols) >= 4:
-            fig.add_vrect(
-                x0=wk_cols[0], x1=wk_cols[3],
-                fillcolor="red", opacity=0.1, layer="below", line_width=0
-            )
+        names = list(self.part_hashes)
+        if names != [self.sheet_combo.itemText(i) for i in range(self.sheet_combo.count())]:
+            self.sheet_combo.blockSignals(True)
+            self.sheet_combo.clear()
+            self.sheet_combo.addItems(names)
+            self.sheet_combo.setCurrentIndex(names.index(sheet) if sheet in names else -1)
+            self.sheet_combo.blockSignals(False)
+
+        if sheet in result['removed_sheets']:
+            self.sheet_indexes.pop(sheet, None)
+            self.drop_charts(lambda key: key[0] == sheet)
+            self.sheet_index = None
+            self.df = None
+            self.project_combo.clear()
+            self.clear_chart()
+            return
+        if 'sheet_index' not in result:
+            return
+
+        sheet_index = result['sheet_index']
+        if sheet_index is None:
+            self.sheet_indexes.pop(sheet, None)
+            self.drop_charts(lambda key: key[0] == sheet)
+            self.on_sheet_loaded(None)
+            return
+
+        changed_projects = result['changed_projects']
+        self.sheet_indexes[sheet] = sheet_index
+        # The overview covers every project, so any change drops it
+        self.drop_charts(lambda key: key[0] == sheet and (
+            key[1] in changed_projects or (key[1] is None and changed_projects)
+        ))
+        self.show_sheet_index(sheet_index, self.reload_stage_timer)
+        self.record_timings("reload", self.reload_stage_timer)
 
-        fig.update_layout(
-            yaxis=dict(tickformat=".0%"),
-            xaxis_tickangle=45
+        # Keep the selected project; its chart is only rebuilt if its rows changed
+        project = self.project_combo.currentText()
+        self.project_combo.blockSignals(True)
+        self.project_combo.clear()
+        self.project_combo.addItems(sheet_index.projects)
+        if project in sheet_index.projects:
+            self.project_combo.setCurrentIndex(sheet_index.projects.index(project))
+        else:
+            self.project_combo.setCurrentIndex(0)
+        self.project_combo.blockSignals(False)
+        if self.project_combo.currentText() != project or project in changed_projects \
+                or (self.overview_check.isChecked() and changed_projects):
+            self.update_project_selection()
+        self.start_prefetch()
+
+    def drop_charts(self, predicate):
+        for key in [key for key in self.chart_cache if predicate(key)]:
+            del self.chart_cache[key]
+
+    def snapshot_key(self, sheet):
+        return self.file_path, sheet, self.part_hashes.get(sheet)
+
+    def save_snapshot(self, sheet_index):
+        if not sheet_index.wk_cols:
+            return
+        sheet = self.sheet_combo.currentText()
+        key = self.snapshot_key(sheet)
+        # Revisited sheets whose content has not changed are already saved or being saved
+        if key in self.snapshot_ids or self.saving_snapshots.get(sheet) == key:
+            return
+        channel = self.history_jobs.get(sheet)
+        if channel is None:
+            channel = self.history_jobs[sheet] = JobChannel(parent=self)
+            channel.finished.connect(self.on_snapshot_saved)
+            channel.failed.connect(lambda message, sheet=sheet: self.on_snapshot_failed(sheet, message))
+        snapshot_date = date.fromtimestamp(os.path.getmtime(self.file_path))
+        self.saving_snapshots[sheet] = key
+        channel.submit(
+            save_history_snapshot, self.get_history_store(), sheet_index, key, snapshot_date,
+            os.path.basename(self.file_path)
         )
 
-        # Render plotly figure to html and load in QWebEngineView
-        html = fig.to_html(include_plotlyjs='cdn')
-        self.chart_view.setHtml(html)
-
-        # Show critical parts summary (simplified: parts where fluctuation > 0.2 in frozen zone)
-        frozen_weeks = wk_cols[:4]
-        all_frozen_data = self.df.melt(
-            id_vars=['Material', 'Production line', 'Deficit quantity'],
-            value_vars=wk_cols,
-            var_name='Week',
-            value_name='Fluctuation'
+    def on_snapshot_saved(self, saved):
+        key, snapshot_id = saved
+        sheet = key[1]
+        self.snapshot_ids[key] = snapshot_id
+        if self.saving_snapshots.get(sheet) == key:
+            del self.saving_snapshots[sheet]
+        if self.history_dialog is not None and self.history_dialog.isVisible() \
+                and key == self.snapshot_key(self.sheet_combo.currentText()):
+            self.history_dialog.show_snapshot(snapshot_id, sheet, os.path.basename(self.file_path))
+
+    def on_snapshot_failed(self, sheet, message):
+        # History is a side feature; a locked or read-only database must not interrupt the analysis
+        self.saving_snapshots.pop(sheet, None)
+        self.show_status(f"⚠️ Saving the snapshot of {sheet} failed", message)
+
+    def open_history(self):
+        sheet = self.sheet_combo.currentText()
+        snapshot_id = self.snapshot_ids.get(self.snapshot_key(sheet))
+        if snapshot_id is None:
+            QMessageBox.information(self, "Info", "Load a sheet first; its snapshot is saved automatically.")
+            return
+        if self.history_dialog is None:
+            from desktop_history import HistoryDialog
+            self.history_dialog = HistoryDialog(self.get_history_store(), self)
+        self.history_dialog.show_snapshot(snapshot_id, sheet, os.path.basename(self.file_path))
+        self.history_dialog.show()
+        self.history_dialog.raise_()
+
+    def open_sweep(self):
+        if self.sheet_index is None:
+            QMessageBox.information(self, "Info", "Load a sheet first.")
+            return
+        if self.sweep_dialog is None:
+            from desktop_sweep import SweepDialog
+            self.sweep_dialog = SweepDialog(self)
+        self.sweep_dialog.set_sheet_index(self.sheet_index, self.sheet_combo.currentText())
+        self.sweep_dialog.show()
+        self.sweep_dialog.raise_()
+
+    def closeEvent(self, event):
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        super().closeEvent(event)
+
+    def on_reload_failed(self, message):
+        # Typically the file is still being written; the next change notification retries
+        self.show_status(f"⚠️ Reloading {os.path.basename(self.file_path)} failed", message)
+
+    def show_status(self, text, details=""):
+        self.status_label.setVisible(bool(text))
+        self.status_label.setText(text or "")
+        self.status_label.setToolTip(details)
+
+
+# Job functions below run on the worker pool; they must not touch widgets.
+# Their imports are local so that startup does not pay for pandas and plotly.
+
+def load_sheet(file_path, sheet, timer, token, report, prefetcher=None, digest=None):
+    from excel_reader import read_sheet
+    from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS, SheetIndex
+
+    df = None
+    if prefetcher is not None:
+        with timer.span("wait_prefetch") as span:
+            df = prefetcher.wait(digest, sheet, cancelled=lambda: token.cancelled)
+            span['rows'] = None if df is None else len(df)
+        token.check()
+    if df is None:
+        with timer.span("read_sheet") as span:
+            df = read_sheet(file_path, sheet, progress=report, digest=digest)
+            span['rows'] = len(df)
+    if 'Production line' not in df.columns:
+        return None
+    with timer.span("sheet_index", rows=len(df)):
+        sheet_index = SheetIndex(df)
+    token.check()
+
+    # Critical parts summary (simplified: parts where fluctuation > 0.2 in frozen zone)
+    with timer.span("critical_detection", rows=len(df)):
+        sheet_index.critical(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+    return sheet_index
+
+
+def reload_workbook(file_path, part_hashes, sheet, sheet_index, timer, token, report):
+    # Compares per-sheet part hashes with the previous load and re-parses the
+    # current sheet only if its part changed. Unchanged projects keep their
+    # memoized critical cells through SheetIndex.refresh.
+    from excel_reader import read_sheet
+    from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS
+
+    with timer.span("part_hashes"):
+        new_hashes = sheet_part_hashes(file_path)
+    result = {
+        'part_hashes': new_hashes,
+        'changed_sheets': changed_sheets(part_hashes, new_hashes),
+        'removed_sheets': [name for name in part_hashes if name not in new_hashes],
+        'sheet': sheet,
+    }
+    if sheet_index is None or sheet not in result['changed_sheets']:
+        return result
+    token.check()
+
+    with timer.span("read_sheet") as span:
+        df = read_sheet(file_path, sheet, progress=report)
+        span['rows'] = len(df)
+    if 'Production line' not in df.columns:
+        result['sheet_index'] = None
+        return result
+    with timer.span("refresh_index", rows=len(df)) as span:
+        new_index, changed_projects = sheet_index.refresh(df)
+        span['changed_projects'] = len(changed_projects)
+    token.check()
+
+    with timer.span("critical_detection", rows=len(df)):
+        new_index.critical(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+    result['sheet_index'] = new_index
+    result['changed_projects'] = changed_projects
+    return result
+
+
+def save_history_snapshot(store, sheet_index, key, snapshot_date, source, token, report):
+    # ``key`` is (file, sheet, sheet content hash); the hash lets the store skip unchanged content
+    _, sheet, digest = key
+    return key, store.save_snapshot(sheet_index, sheet, snapshot_date, source=source, digest=digest)
+
+
+def build_project_chart(sheet_index, project, mode, timer, token, report):
+    from charts import fluctuation_figure
+
+    project_frame = sheet_index.project_frame(project)
+    with timer.span("line_figure", rows=len(project_frame), mode=mode):
+        fig = fluctuation_figure(
+            project_frame,
+            sheet_index.wk_cols,
+            project,
+            matrix=sheet_index.project_matrix(project),
+            mode=mode
         )
-        frozen_data = all_frozen_data[all_frozen_data['Week'].isin(frozen_weeks)].copy()
+    token.check()
 
-        critical_data = frozen_data[frozen_data['Fluctuation'] > 0.2].copy()
+    # Only the figure JSON is serialized; the GUI thread hands it to Plotly.react
+    with timer.span("figure_json", rows=len(project_frame)) as span:
+        figure_json = fig.to_json()
+        span['bytes'] = len(figure_json)
+    return figure_json
 
-        self.metric_critical_parts.setText(f"Critical Parts: {len(critical_data['Material'].unique())}")
-        self.metric_projects_affected.setText(f"Projects Affected: {len(critical_data['Production line'].unique())}")
-        highest = critical_data['Fluctuation'].max() if not critical_data.empty else 0
-        self.metric_highest_fluctuation.setText(f"Highest Fluctuation: {highest:.1%}")
-        self.metric_affected_weeks.setText(f"Affected Weeks: {len(critical_data['Week'].unique())}")
 
-        # Show critical parts table
-        if not critical_data.empty:
-            display_df = critical_data[['Production line', 'Material', 'Week', 'Fluctuation']].copy()
-            display_df['Fluctuation'] = display_df['Fluctuation'].map('{:.1%}'.format)
-            self.critical_table.setModel(PandasModel(display_df))
-        else:
-            self.critical_table.setModel(PandasModel(pd.DataFrame()))
+def export_rows(path, columns, rows, token, report):
+    from export import export_critical
+    # report() raises once the export is cancelled, leaving no partial file
+    return export_critical(path, columns, rows, progress=report), len(rows)
+
+
+def build_overview_chart(sheet_index, timer, token, report):
+    from charts import project_overview_figure
+    from fluctuation import CRITICAL_THRESHOLD
+
+    with timer.span("overview_figure", rows=len(sheet_index.projects)):
+        fig = project_overview_figure(sheet_index.cube(CRITICAL_THRESHOLD).overview(), sheet_index.wk_cols)
+    token.check()
+    with timer.span("figure_json") as span:
+        figure_json = fig.to_json()
+        span['bytes'] = len(figure_json)
+    return figure_json
+
+
+def create_application(argv):
+    # QtWebEngine is imported after the application exists, which requires shared GL contexts
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    return QApplication(argv)
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    app = create_application(sys.argv)
     window = FluctuationApp()
     window.show()
     sys.exit(app.exec())
@@ -1,224 +1,439 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from background_parse import BackgroundParser
+from excel_cache import SheetCache, file_digest
+from excel_reader import read_sheet
+from export import EXPORT_FORMATS, export_critical
+from detail_index import DetailIndex
+from charts import (
+    CHART_MODES, HEATMAP_PAGE_SIZE, MODE_LABELS, critical_bar_figure, fluctuation_figure,
+    part_trend_figure, project_overview_figure, project_parts_heatmap_figure, project_week_heatmap_figure,
+    sweep_figure
+)
+from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS, SheetIndex
+from history import HistoryStore
+from normalize import MAX_EXAMPLES, unparsed_cells
+from prefetch import SheetPrefetcher
+from timing import StageTimer
+from ui_inputs import parse_values
 
 st.set_page_config(page_title="Fluctuation Dashboard", layout="wide")
 st.title("📈 Material Fluctuation Visualizer")
 
-uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx", "xlsm"])
-
-if uploaded_file:
-    xls = pd.ExcelFile(uploaded_file)
-    sheet_name = st.selectbox("Select Sheet", xls.sheet_names)
-    df = pd.read_excel(xls, sheet_name=sheet_name)
-
-    if 'Production line' not in df.columns:
-        st.error("❌ The selected sheet does not contain 'Material type' column.")
-    else:
-        project = st.selectbox("Select Project", sorted(df['Production line'].dropna().unique()))
-        df_selected = df[df['Production line'] == project].copy()
-
-        # Detect week columns
-        wk_cols = [col for col in df_selected.columns if col.lower().startswith('wk')]
-        if not wk_cols:
-            st.warning("No week columns found (starting with 'wk').")
-        else:
-            # Clean % signs
-            # for col in wk_cols + ['Deficit quantity']:
-            #     df_selected[col] = df_selected[col].replace('%', '', regex=True).astype(float) / 100.0
-
-            # Melt to long format
-            df_long = df_selected.melt(
-                id_vars=['Material', 'Production line', 'Deficit quantity'],
-                value_vars=wk_cols,
-                var_name='Week',
-                value_name='Fluctuation'
-            )
 
-            # Add the "Deficit" as first week-like value
-            deficit_rows = df_selected[['Material', 'Production line', 'Deficit quantity']].copy()
-            deficit_rows['Week'] = 'Deficit'
-            deficit_rows['Fluctuation'] = deficit_rows['Deficit quantity']
-            df_long = pd.concat([deficit_rows, df_long], ignore_index=True)
-
-            # Ensure proper ordering
-            week_order = ['Deficit'] + wk_cols
-            df_long['Week'] = pd.Categorical(df_long['Week'], categories=week_order, ordered=True)
-            df_long = df_long.sort_values(['Material', 'Week'])
-
-           
-
-            fig = px.line(
-                df_long,
-                x='Week',
-                y='Fluctuation',
-                color='Material',
-                markers=True,
-                title=f"Fluctuation Over Weeks - {project}",
-                hover_data=['Deficit quantity'],
-                height=600,
-                width=1100
+# One parsed-sheet cache shared by every rerun and session of this server.
+# Set FLUX_CACHE_DIR to also keep Parquet copies on disk across restarts.
+@st.cache_resource
+def get_sheet_cache():
+    return SheetCache(sidecar_dir=os.environ.get("FLUX_CACHE_DIR"))
+
+
+def parse_with_progress(buffer, sheet_name, digest=None):
+    progress_bar = st.progress(0.0, text=f"Parsing '{sheet_name}'...")
+
+    def report(rows_read, total_rows):
+        fraction = min(rows_read / total_rows, 1.0) if total_rows else 0.0
+        progress_bar.progress(fraction, text=f"Parsing '{sheet_name}'... {rows_read:,} rows")
+
+    df = read_sheet(buffer, sheet_name, progress=report, digest=digest)
+    progress_bar.empty()
+    return df
+
+
+# Worker processes that parse every sheet of an upload ahead of time into the shared cache
+@st.cache_resource
+def get_prefetcher():
+    return SheetPrefetcher(get_sheet_cache())
+
+
+def parse_prefetched(prefetcher, digest):
+    # Parse function for SheetCache.load that waits for the prefetched frame
+    # and only parses in the foreground if prefetching failed
+    def parse(buffer, sheet_name):
+        with st.spinner(f"Parsing '{sheet_name}'..."):
+            df = prefetcher.wait(digest, sheet_name)
+        if df is None:
+            df = parse_with_progress(buffer, sheet_name, digest)
+        return df
+    return parse
+
+
+# Sheets that are not cached yet are parsed on background threads into the shared cache
+@st.cache_resource
+def get_background_parser():
+    return BackgroundParser(get_sheet_cache())
+
+
+PARSE_POLL_SECONDS = 0.5
+
+
+def parse_status(job):
+    # Progress of a background parse with the projects and critical metrics found
+    # so far; reruns the whole page once the sheet is parsed
+    if job.done:
+        if job.error is None:
+            st.rerun()
+        st.error(f"❌ Failed to parse '{job.sheet_name}': {job.error}")
+        if st.button("Retry"):
+            get_background_parser().forget(job)
+            st.rerun()
+        return
+    rows_read, total_rows, project_rows, metrics = job.snapshot()
+    fraction = min(rows_read / total_rows, 1.0) if total_rows else 0.0
+    st.progress(
+        fraction, text=f"Parsing '{job.sheet_name}'... {rows_read:,} rows ({job.elapsed:.0f} s)"
+    )
+    st.caption("Critical parts found so far (all projects); charts appear when parsing completes.")
+    m1, m2, m3, m4 = st.columns(4)
+    with m1:
+        st.metric("Critical Parts", metrics['critical_parts'])
+    with m2:
+        st.metric("Projects Affected", metrics['projects_affected'])
+    with m3:
+        st.metric("Highest Fluctuation", f"{metrics['highest_fluctuation']:.1%}")
+    with m4:
+        st.metric("Affected Weeks", metrics['affected_weeks'])
+    if project_rows:
+        st.dataframe(
+            pd.DataFrame({'Project': list(project_rows), 'Rows so far': list(project_rows.values())})
+            .sort_values('Project'),
+            hide_index=True
+        )
+
+
+# Project grouping and all-project critical analysis, built once per loaded sheet
+@st.cache_resource(max_entries=8)
+def get_sheet_index(digest, sheet_name, _df):
+    return SheetIndex(_df)
+
+
+# Sorted, bitmap-indexed critical table behind the details section
+@st.cache_resource(max_entries=8)
+def get_detail_index(digest, sheet_name, _critical_data):
+    return DetailIndex(_critical_data)
+
+
+PAGE_SIZES = [50, 100, 250, 500]
+
+
+# Figures of one project, memoized so returning to a project skips the figure build
+@st.cache_resource(max_entries=32)
+def get_project_figure(digest, sheet_name, project, mode, _sheet_index):
+    return fluctuation_figure(
+        _sheet_index.project_frame(project),
+        _sheet_index.wk_cols,
+        project,
+        matrix=_sheet_index.project_matrix(project),
+        mode=mode
+    )
+
+
+# Figures of the all-project critical section; they only change with the sheet
+@st.cache_resource(max_entries=8)
+def get_critical_figures(digest, sheet_name, _sheet_index):
+    critical = _sheet_index.critical(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+    peaks, counts = _sheet_index.project_week_heatmap(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+    return (
+        critical_bar_figure(critical.summary),
+        project_week_heatmap_figure(peaks, counts),
+        project_overview_figure(_sheet_index.cube(CRITICAL_THRESHOLD).overview(), _sheet_index.wk_cols),
+    )
+
+
+@st.cache_data(max_entries=32)
+def get_sweep(digest, sheet_name, thresholds, frozen_lengths, _sheet_index):
+    return _sheet_index.threshold_sweep(list(thresholds), list(frozen_lengths))
+
+
+# Exports are written by a small thread pool so the session stays responsive
+# while large files are produced; the finished file is then offered for download
+@st.cache_resource
+def get_export_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+
+EXPORT_POLL_SECONDS = 1.0
+# Every export is written to its own directory under EXPORT_ROOT. A session
+# removes its previous export when it starts a new one; exports of abandoned
+# sessions are removed once older than EXPORT_MAX_AGE_SECONDS.
+EXPORT_ROOT = os.path.join(tempfile.gettempdir(), "flux-exports")
+EXPORT_MAX_AGE_SECONDS = 3600
+EXPORT_MIME = {
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'csv': "text/csv",
+    'parquet': "application/octet-stream",
+}
+
+
+def prune_exports(max_age=EXPORT_MAX_AGE_SECONDS):
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(EXPORT_ROOT))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            expired = entry.is_dir() and entry.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if expired:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def start_export(detail_index, positions, fmt, file_stem):
+    # Replaces this session's previous export (and its files) with a new one
+    previous = st.session_state.pop('export', None)
+    if previous is not None:
+        previous['cancelled'].set()
+        # A running export stops at its next chunk and removes its temporary
+        # file; its directory is left to prune_exports rather than deleted
+        # under the writing thread
+        if previous['future'].cancel() or previous['future'].done():
+            shutil.rmtree(previous['dir'], ignore_errors=True)
+    prune_exports()
+    os.makedirs(EXPORT_ROOT, exist_ok=True)
+    export_dir = tempfile.mkdtemp(prefix="export-", dir=EXPORT_ROOT)
+    progress = {'done': 0, 'total': len(positions)}
+    cancelled = threading.Event()
+
+    def report(done, total):
+        if cancelled.is_set():
+            raise CancelledError()
+        progress.update(done=done)
+
+    future = get_export_executor().submit(
+        export_critical, os.path.join(export_dir, f"{file_stem}.{fmt}"), detail_index.columns, positions,
+        progress=report
+    )
+    st.session_state['export'] = {
+        'future': future, 'progress': progress, 'cancelled': cancelled, 'dir': export_dir, 'polling': False
+    }
+
+
+def export_status():
+    # Progress while the export runs, download buttons once it is written
+    job = st.session_state.get('export')
+    if job is None:
+        return
+    future, progress = job['future'], job['progress']
+    if not future.done():
+        fraction = progress['done'] / progress['total'] if progress['total'] else 0.0
+        st.progress(fraction, text=f"Exporting... {progress['done']:,} of {progress['total']:,} rows")
+        return
+    if job['polling']:
+        # Finished: one full rerun to stop polling
+        job['polling'] = False
+        st.rerun()
+    if future.exception() is not None:
+        st.error(f"Export failed: {future.exception()}")
+        return
+    paths = future.result()
+    if not all(os.path.exists(path) for path in paths):
+        st.info("This export has expired; export again to download it.")
+        return
+    for path in paths:
+        name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            st.download_button(
+                f"⬇️ Download {name}", f, file_name=name,
+                mime=EXPORT_MIME.get(os.path.splitext(name)[1].lstrip('.')), key=f"download_{name}"
             )
 
-            # Add horizontal line at 20%
-            shapes = [
-                dict(
-                    type='line',
-                    xref='paper', x0=0, x1=1,
-                    yref='y', y0=0.2, y1=0.2,
-                    line=dict(color='red', width=2, dash='dash')
-                ),
-                dict(
-                    type='line',
-                    xref='paper', x0=0, x1=1,
-                    yref='y', y0=-0.2, y1=-0.2,
-                    line=dict(color='red', width=2, dash='dash')
-                )
-            ]
-
-            # Add frozen zone (first 4 weeks)
-            if len(wk_cols) >= 4:
-                shapes.append(
-                    dict(
-                        type='rect',
-                        xref='x',
-                        yref='paper',
-                        x0=wk_cols[0],
-                        x1=wk_cols[3],
-                        y0=0,
-                        y1=1,
-                        fillcolor='rgba(255, 0, 0, 0.1)',
-                        line=dict(width=0),
-                        layer='below'
-                    )
-                )
 
-            fig.update_layout(
-                yaxis=dict(tickformat=".0%"),
-                xaxis_tickangle=45,
-                shapes=shapes
-            )
+# Snapshot history (SQLite) shared by all sessions; FLUX_HISTORY_DB chooses the file
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
 
-            st.plotly_chart(fig, use_container_width=True, key="description_chart")
 
+# Stage timings of this rerun, shown in the sidebar and appended to the timing log
+timer = StageTimer("streamlit")
+st.session_state['section_timings'] = {}
 
-            # New section for critical parts analysis across all projects
-            st.markdown("---")
-            st.subheader("🚨 Critical Parts Analysis (Frozen Zone) - All Projects")
-            
-            # Analyze frozen zone for all projects
-            frozen_weeks = wk_cols[:4]
-            # Use original df instead of df_selected to get all projects
-            all_frozen_data = df.melt(
-                id_vars=['Material', 'Production line', 'Deficit quantity'],
-                value_vars=wk_cols,
-                var_name='Week',
-                value_name='Fluctuation'
-            )
-            
-            # Filter for frozen weeks
-            frozen_data = all_frozen_data[all_frozen_data['Week'].isin(frozen_weeks)].copy()
-
-            # st.markdown("### frozen_data")
-            # st.dataframe(frozen_data)
-            
-            # # Convert fluctuation to numeric
-            # frozen_data['Fluctuation'] = pd.to_numeric(
-            #     frozen_data['Fluctuation'].replace('%', '', regex=True),
-            #     errors='coerce'
-            # ) / 100.0
-
-            # st.markdown("### frozen_data['Fluctuation']")
-            # st.dataframe(frozen_data['Fluctuation'])
-            # Create critical parts dashboard
-            critical_data = frozen_data[frozen_data['Fluctuation'] > 0.2].copy()
-
-            # st.markdown("### critical_data")
-            # st.dataframe(critical_data)
-
-            
-            if not critical_data.empty:
-                # Create columns for metrics
-                m1, m2, m3, m4 = st.columns(4)
-                with m1:
-                    st.metric("Critical Parts", len(critical_data['Material'].unique()))
-                with m2:
-                    st.metric("Projects Affected", len(critical_data['Production line'].unique()))
-                with m3:
-                    st.metric("Highest Fluctuation", f"{critical_data['Fluctuation'].max():.1%}")
-                with m4:
-                    st.metric("Affected Weeks", len(critical_data['Week'].unique()))
-
-                # Create visualization columns
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Bar chart for critical parts
-                    critical_summary = critical_data.groupby(['Material', 'Production line'])['Fluctuation'].max().reset_index()
-                    fig_critical = px.bar(
-                        critical_summary,
-                        x='Material',
-                        y='Fluctuation',
-                        color='Production line',
-                        title='Maximum Fluctuation by Critical Part',
-                        labels={'Fluctuation': 'Max Fluctuation'},
-                        height=400
-                    )
-                    fig_critical.add_hline(y=0.2, line_dash="dash", line_color="red")
-                    st.plotly_chart(fig_critical, use_container_width=True, key="all_critical_chart")
-
-                with col2:
-                    # Heatmap by project and week
-                    pivot_table = critical_data.pivot_table(
-                        index=['Production line', 'Material'],
-                        columns='Week',
-                        values='Fluctuation',
-                        aggfunc='max'
-                    )
-                    fig_heat = px.imshow(
-                        pivot_table,
-                        title='Critical Parts Heatmap by Project',
-                        color_continuous_scale='RdYlBu_r',
-                        aspect='auto',
-                        labels={'color': 'Fluctuation'}
-                    )
-                    fig_heat.update_layout(height=400)
-                    st.plotly_chart(fig_heat, use_container_width=True, key="all_heat_chart")
+# Identifies this session to the shared prefetcher, e.g. to drop only its own queued work
+session_key = st.session_state.setdefault('session_key', uuid.uuid4().hex)
 
-          # Detailed table with project information
-            st.subheader("Critical Parts Details - All Projects")
 
-            # Unique filter values
-            material_types = critical_data['Production line'].unique()
-            materials = critical_data['Material'].unique()
-            weeks = sorted(critical_data['Week'].unique())
+@contextmanager
+def section_timer(name):
+    # Timer of one dashboard section. Sections are fragments that can rerun on
+    # their own, so each keeps its latest timings in the session for the panel.
+    section = StageTimer("streamlit", section=name, **timer.context)
+    try:
+        yield section
+    finally:
+        st.session_state.setdefault('section_timings', {})[name] = section.rows()
+        section.flush()
 
-            # Filter widgets
-            selected_material_type = st.multiselect("Select Project(s)", material_types)
-            selected_material = st.multiselect("Select Part Number(s)", materials)
-            selected_week = st.multiselect("Select Week(s)", weeks)
 
-            # Apply filters
-            filtered_data = critical_data.copy()
+# Each section below is a fragment: a widget inside it reruns only that
+# section, so e.g. a table filter does not rebuild the charts above it.
 
-            if selected_material_type:
-                filtered_data = filtered_data[filtered_data['Production line'].isin(selected_material_type)]
+@st.fragment
+def project_section(digest, sheet_name, sheet_index):
+    project = st.selectbox("Select Project", sheet_index.projects)
+    # Per-material lines for small projects, packed WebGL or envelope views for large ones
+    chart_mode = st.radio(
+        "Chart mode", CHART_MODES, format_func=MODE_LABELS.get, horizontal=True
+    )
+    with section_timer("project") as timer:
+        rows = sheet_index.project_slice(project)
+        with timer.span("line_figure", rows=rows.stop - rows.start, mode=chart_mode):
+            fig = get_project_figure(digest, sheet_name, project, chart_mode, sheet_index)
+        with timer.span("render_line_chart"):
+            st.plotly_chart(fig, use_container_width=True, key="description_chart")
 
-            if selected_material:
-                filtered_data = filtered_data[filtered_data['Material'].isin(selected_material)]
 
-            if selected_week:
-                filtered_data = filtered_data[filtered_data['Week'].isin(selected_week)]
+@st.fragment
+def critical_section(digest, sheet_name, sheet_index):
+    wk_cols = sheet_index.wk_cols
+    with section_timer("critical") as timer:
+        # Frozen zone analysis for all projects, precomputed with the sheet index
+        with timer.span("critical_detection", rows=len(sheet_index)):
+            critical = sheet_index.critical(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+        if critical.data.empty:
+            return
+
+        # Metric cards from the project x week cube built with the sheet index
+        with timer.span("metrics", rows=len(sheet_index.projects)):
+            metrics = sheet_index.metrics(CRITICAL_THRESHOLD, FROZEN_WEEKS)
+        m1, m2, m3, m4 = st.columns(4)
+        with m1:
+            st.metric("Critical Parts", metrics['critical_parts'])
+        with m2:
+            st.metric("Projects Affected", metrics['projects_affected'])
+        with m3:
+            st.metric("Highest Fluctuation", f"{metrics['highest_fluctuation']:.1%}")
+        with m4:
+            st.metric("Affected Weeks", metrics['affected_weeks'])
+
+        with timer.span("critical_figures", rows=len(critical.summary)):
+            fig_critical, fig_heatmap, fig_overview = get_critical_figures(digest, sheet_name, sheet_index)
+
+        # Weekly peaks of every project, also from the cube
+        st.plotly_chart(fig_overview, use_container_width=True, key="projects_overview_chart")
+
+        # Create visualization columns
+        col1, col2 = st.columns(2)
+
+        with col1:
+            # Bar chart for critical parts
+            st.plotly_chart(fig_critical, use_container_width=True, key="all_critical_chart")
+
+        with col2:
+            # Heatmap aggregated to project x week; parts of one project on demand, paged
+            heat_level = st.radio(
+                "Heatmap", ["Projects × weeks", "Parts of one project"], horizontal=True
+            )
+            if heat_level == "Projects × weeks":
+                fig_heat = fig_heatmap
+            else:
+                affected = list(critical.summary['Production line'].dropna().unique())
+                heat_project = st.selectbox("Drill-down project", affected)
+                with timer.span("heatmap_drilldown") as span:
+                    materials, values = sheet_index.project_critical_rows(
+                        heat_project, CRITICAL_THRESHOLD, FROZEN_WEEKS
+                    )
+                    span['rows'] = len(materials)
+                n_heat_pages = max(1, -(-len(materials) // HEATMAP_PAGE_SIZE))
+                heat_page = st.number_input(
+                    f"Page (top {HEATMAP_PAGE_SIZE} parts each)",
+                    min_value=1, max_value=n_heat_pages, value=1, step=1
+                )
+                fig_heat = project_parts_heatmap_figure(
+                    materials, values, wk_cols[:FROZEN_WEEKS], heat_project, heat_page - 1
+                )
+            st.plotly_chart(fig_heat, use_container_width=True, key="all_heat_chart")
+
+
+@st.fragment
+def sweep_section(digest, sheet_name, sheet_index):
+    # What-if: other thresholds and frozen-zone lengths, from the loaded week matrix
+    wk_cols = sheet_index.wk_cols
+    with st.expander("🔬 What-if: threshold and frozen-zone sensitivity"):
+        w1, w2 = st.columns(2)
+        with w1:
+            sweep_thresholds = parse_values(
+                st.text_input("Thresholds", value="0.1, 0.15, 0.2, 0.25, 0.3",
+                              help="Comma-separated, as fractions or percentages")
+            )
+        with w2:
+            sweep_frozen = st.multiselect(
+                "Frozen-zone lengths (weeks)", list(range(1, len(wk_cols) + 1)),
+                default=[w for w in (2, FROZEN_WEEKS, 6) if w <= len(wk_cols)]
+            )
+        with section_timer("sweep") as timer:
+            with timer.span("threshold_sweep", rows=len(sheet_index)) as span:
+                sweep = get_sweep(digest, sheet_name, tuple(sweep_thresholds), tuple(sweep_frozen), sheet_index)
+                span['combinations'] = len(sweep)
+        if sweep.empty:
+            st.info("Enter at least one threshold and one frozen-zone length.")
+        else:
+            st.plotly_chart(sweep_figure(sweep), use_container_width=True, key="sweep_chart")
+            st.dataframe(
+                sweep.assign(**{
+                    'Threshold': sweep['Threshold'].map('{:.0%}'.format),
+                    'Worst fluctuation': sweep['Worst fluctuation'].map(
+                        lambda v: "" if pd.isna(v) else f"{v:.1%}"),
+                }),
+                hide_index=True
+            )
 
-            # Prepare the table
-            detail_data = filtered_data[
-                ['Production line', 'Material', 'Week', 'Fluctuation']
-            ].sort_values(['Production line', 'Material', 'Week'])
 
-            detail_data['Fluctuation'] = detail_data['Fluctuation'].map('{:.1%}'.format)
+@st.fragment
+def details_section(digest, sheet_name, sheet_index):
+    # Detailed table with project information
+    st.subheader("Critical Parts Details - All Projects")
+    critical_data = sheet_index.critical(CRITICAL_THRESHOLD, FROZEN_WEEKS).data
+
+    with section_timer("details") as timer:
+        with timer.span("detail_index", rows=len(critical_data)):
+            detail_index = get_detail_index(digest, sheet_name, critical_data)
+
+        # Filter widgets
+        selected_material_type = st.multiselect("Select Project(s)", detail_index.categories['Production line'])
+        selected_material = st.multiselect("Select Part Number(s)", detail_index.categories['Material'])
+        selected_week = st.multiselect("Select Week(s)", detail_index.categories['Week'])
+
+        with timer.span("filter_table", rows=len(critical_data)) as span:
+            # Bitmap AND across the three filters; rows come back already sorted
+            positions = detail_index.select({
+                'Production line': selected_material_type,
+                'Material': selected_material,
+                'Week': selected_week,
+            })
+            span['rows'] = len(positions)
+
+        # Only the visible page is formatted and sent to the browser
+        page_col, size_col = st.columns([3, 1])
+        with size_col:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+        n_pages = max(1, -(-len(positions) // page_size))
+        with page_col:
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        first_row = (page - 1) * page_size
+        st.caption(
+            f"Rows {min(first_row + 1, len(positions)):,}–{min(first_row + page_size, len(positions)):,} "
+            f"of {len(positions):,}"
+        )
+
+        with timer.span("format_page") as span:
+            detail_data = detail_index.page(
+                positions, page - 1, page_size, formatters={'Fluctuation': '{:.1%}'.format}
+            )
+            span['rows'] = len(detail_data)
 
-            # Show the table
+        # Show the table
+        with timer.span("render_table", rows=len(detail_data)):
             st.dataframe(
                 detail_data,
                 column_config={
@@ -229,3 +444,165 @@ if uploaded_file:
                 },
                 hide_index=True
             )
+
+        # Export of all filtered rows (not just this page) and their per-project summary
+        export_col, button_col = st.columns([3, 1])
+        with export_col:
+            export_fmt = st.selectbox("Export format", list(EXPORT_FORMATS), format_func=EXPORT_FORMATS.get)
+        with button_col:
+            if st.button(f"Export {len(positions):,} rows", disabled=not len(positions)):
+                start_export(detail_index, positions, export_fmt, f"{sheet_name} critical parts")
+                # A full rerun, so the status section below starts polling
+                st.rerun()
+
+
+@st.fragment
+def history_section(history, snapshot_id, sheet_name, series):
+    # Newly critical parts and the trend of one part, within the snapshot series
+    st.markdown("---")
+    st.subheader("📅 Snapshot History")
+    with section_timer("history") as timer:
+        with timer.span("newly_critical") as span:
+            previous_id = history.previous_snapshot(snapshot_id)
+            newly = history.newly_critical(snapshot_id, previous_id) if previous_id else None
+            span['rows'] = None if newly is None else len(newly)
+        if newly is None:
+            st.info(
+                f"This is the first snapshot of '{sheet_name}' in '{series}'; "
+                "newly critical parts appear from the next one."
+            )
+        else:
+            dates = history.snapshots(sheet_name, series).set_index('id')['snapshot_date']
+            st.markdown(
+                f"**{len(newly):,} parts newly critical** since the snapshot of {dates.get(previous_id)}"
+            )
+            shown = newly.head(1000)
+            st.dataframe(
+                shown.assign(**{
+                    col: shown[col].map(lambda v: "" if pd.isna(v) else f"{v:.1%}")
+                    for col in ['Fluctuation', 'Previous fluctuation']
+                }),
+                hide_index=True
+            )
+            if len(newly) > len(shown):
+                st.caption(f"Showing the {len(shown):,} largest of {len(newly):,}.")
+
+        default_part = newly['Material'].iloc[0] if newly is not None and len(newly) else ""
+        trend_part = st.text_input("Part number for trend", value=default_part)
+        if trend_part:
+            with timer.span("part_trend") as span:
+                trend = history.part_trend(trend_part.strip(), sheet=sheet_name, series=series)
+                span['rows'] = len(trend)
+            if trend.empty:
+                st.info(f"No snapshots contain part '{trend_part}'.")
+            else:
+                st.plotly_chart(
+                    part_trend_figure(trend, trend_part.strip()), use_container_width=True, key="trend_chart"
+                )
+
+
+prefetch_all = st.sidebar.checkbox(
+    "Prefetch all sheets",
+    value=False,
+    help="Parse every sheet in the background after upload so switching sheets is instant."
+)
+
+save_history = st.sidebar.checkbox(
+    "Save snapshots to history",
+    value=False,
+    help="Store each analyzed sheet so part trends and newly critical parts can be compared over time."
+)
+snapshot_date = st.sidebar.date_input("Snapshot date", value=date.today())
+history_series = st.sidebar.text_input(
+    "History series",
+    help="Snapshots are replaced and compared only within one series, e.g. a plant. "
+         "Leave empty to use the file name."
+)
+
+uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx", "xlsm"])
+
+if uploaded_file:
+    sheet_cache = get_sheet_cache()
+    file_bytes = uploaded_file.getvalue()
+    digest = file_digest(file_bytes)
+    names = sheet_cache.sheet_names(file_bytes, digest=digest)
+    sheet_name = st.selectbox("Select Sheet", names)
+    timer.context.update(file=uploaded_file.name, sheet=sheet_name, file_bytes=len(file_bytes))
+
+    prefetcher = None
+    if prefetch_all and len(names) > 1:
+        # The selected sheet is queued first; already cached or queued sheets are skipped
+        prefetcher = get_prefetcher()
+        prefetcher.prefetch(file_bytes, names, digest, first=sheet_name, owner=session_key)
+
+    with timer.span("load_sheet", cached=(digest, sheet_name) in sheet_cache) as span:
+        df = sheet_cache.get(digest, sheet_name)
+        if df is None and prefetcher is not None and prefetcher.pending(digest, sheet_name):
+            df = sheet_cache.load(file_bytes, sheet_name, digest=digest, parse=parse_prefetched(prefetcher, digest))
+        span['rows'] = None if df is None else len(df)
+
+    if df is None:
+        # Parsed in the background; the status polls until the sheet is in the cache.
+        # Selecting another sheet cancels this session's parse of the previous one.
+        job = get_background_parser().start(file_bytes, sheet_name, digest, owner=session_key)
+        if job is None:
+            st.rerun()
+        st.fragment(parse_status, run_every=PARSE_POLL_SECONDS)(job)
+        st.stop()
+
+    if 'Production line' not in df.columns:
+        st.error("❌ The selected sheet does not contain 'Material type' column.")
+    else:
+        with timer.span("sheet_index", rows=len(df)):
+            sheet_index = get_sheet_index(digest, sheet_name, df)
+
+        # Value cells that were neither numbers nor percentages are left blank
+        n_unparsed, unparsed_examples = unparsed_cells(df)
+        if n_unparsed:
+            with st.expander(f"⚠️ {n_unparsed:,} cells could not be read as numbers and were left blank"):
+                st.dataframe(unparsed_examples, hide_index=True)
+                if n_unparsed > len(unparsed_examples):
+                    st.caption(f"Showing the first {MAX_EXAMPLES} per column.")
+
+        # Detect week columns
+        if not sheet_index.wk_cols:
+            st.selectbox("Select Project", sheet_index.projects)
+            st.warning("No week columns found (starting with 'wk').")
+        else:
+            project_section(digest, sheet_name, sheet_index)
+
+            # New section for critical parts analysis across all projects
+            st.markdown("---")
+            st.subheader("🚨 Critical Parts Analysis (Frozen Zone) - All Projects")
+            critical_section(digest, sheet_name, sheet_index)
+            sweep_section(digest, sheet_name, sheet_index)
+            details_section(digest, sheet_name, sheet_index)
+
+            # Polls on its own while an export is being written
+            export_job = st.session_state.get('export')
+            polling = export_job is not None and not export_job['future'].done()
+            if export_job is not None:
+                export_job['polling'] = polling
+            st.fragment(export_status, run_every=EXPORT_POLL_SECONDS if polling else None)()
+
+            # Snapshot history; saving is skipped when this sheet's content is already stored
+            if save_history:
+                series = history_series.strip() or uploaded_file.name
+                with timer.span("save_snapshot", rows=len(df)):
+                    snapshot_id = get_history_store().save_snapshot(
+                        sheet_index, sheet_name, snapshot_date, source=uploaded_file.name, digest=digest,
+                        series=series
+                    )
+                history_section(get_history_store(), snapshot_id, sheet_name, series)
+
+# Performance panel: this full rerun plus the latest run of every section
+section_timings = st.session_state.get('section_timings', {})
+if timer.spans or section_timings:
+    rows = timer.rows() + [row for rows in section_timings.values() for row in rows]
+    with st.sidebar.expander("⏱ Performance", expanded=False):
+        st.caption(
+            f"Total {sum(row['Time (ms)'] for row in rows):,.0f} ms; "
+            "sections that reran on their own show their latest timings"
+        )
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    timer.flush()
@@ -0,0 +1,114 @@
+import io
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from excel_reader import read_sheet
+from fluctuation import CriticalTally
+
+# Sheet parsing on a background thread for the Streamlit app, so a large
+# upload shows progress, the projects found so far and running critical
+# metrics instead of a blocked page. Finished frames go into the SheetCache;
+# the page then reruns and builds the charts from the cached frame.
+
+
+class ParseJob:
+    def __init__(self, digest, sheet_name):
+        self.digest = digest
+        self.sheet_name = sheet_name
+        self.rows_read = 0
+        self.total_rows = None
+        self.tally = CriticalTally()
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        # Sessions waiting for this sheet; the parse is cancelled once none is left
+        self.owners = set()
+        self.started = time.perf_counter()
+        self.seconds = None
+        self._lock = threading.Lock()
+
+    def _progress(self, rows_read, total_rows):
+        if self.cancelled:
+            raise CancelledError()
+        self.rows_read, self.total_rows = rows_read, total_rows
+
+    def _add_chunk(self, chunk):
+        with self._lock:
+            self.tally.add(chunk)
+
+    def snapshot(self):
+        # Consistent copy of the progress for display:
+        # (rows read, total rows or None, projects with row counts, metrics)
+        with self._lock:
+            return self.rows_read, self.total_rows, dict(self.tally.project_rows), self.tally.metrics
+
+    @property
+    def elapsed(self):
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.started
+
+
+class BackgroundParser:
+    def __init__(self, cache, max_workers=2):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="parse")
+        self._jobs = {}
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def start(self, data, sheet_name, digest, owner=None):
+        # Running (or failed) job of this sheet, else a newly started one; None
+        # if the sheet was parsed into the cache since the caller looked it up.
+        # The owner's job for another sheet is cancelled unless another owner
+        # still waits for it.
+        key = (digest, sheet_name)
+        with self._lock:
+            if key in self.cache:
+                return None
+            job = self._jobs.get(key)
+            if job is None:
+                job = ParseJob(digest, sheet_name)
+                self._jobs[key] = job
+                self._executor.submit(self._run, job, data)
+            if owner is not None:
+                previous = self._owners.get(owner)
+                if previous is not None and previous is not job:
+                    previous.owners.discard(owner)
+                    if not previous.owners:
+                        self._drop(previous)
+                self._owners[owner] = job
+                job.owners.add(owner)
+            return job
+
+    def _run(self, job, data):
+        try:
+            df = read_sheet(
+                io.BytesIO(data), job.sheet_name, progress=job._progress, on_chunk=job._add_chunk,
+                digest=job.digest
+            )
+            self.cache.put(job.digest, job.sheet_name, df)
+        except CancelledError:
+            pass
+        except Exception as e:
+            job.error = e
+        finally:
+            job.seconds = time.perf_counter() - job.started
+            job.done = True
+            # Finished frames are served from the cache; failed jobs are kept
+            # until dismissed, so the error can be shown
+            if job.error is None:
+                self.forget(job)
+
+    def forget(self, job):
+        with self._lock:
+            self._drop(job)
+
+    def _drop(self, job):
+        # Called with the lock held; a running parse stops at its next chunk
+        if not job.done:
+            job.cancelled = True
+        if self._jobs.get((job.digest, job.sheet_name)) is job:
+            del self._jobs[(job.digest, job.sheet_name)]
+        for owner in job.owners:
+            if self._owners.get(owner) is job:
+                del self._owners[owner]
@@ -0,0 +1,243 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from excel_reader import read_sheet, sheet_names
+from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS, SheetIndex, project_summary
+
+# Headless frozen-zone analysis over many workbooks:
+#
+#   python batch.py "plants/**/*.xlsx" --output-dir reports --format parquet
+#
+# Sheets are parsed in a process pool (one worker per core by default). For each
+# workbook the critical parts table and the per-project summary are written to
+# <output-dir>/<name>.critical.<ext> and <name>.summary.<ext>. A manifest of
+# content hashes in the output directory lets unchanged files be skipped.
+
+EXCEL_PATTERNS = ('*.xlsx', '*.xlsm')
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_workbooks(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for pattern in EXCEL_PATTERNS:
+                paths.extend(glob.glob(os.path.join(item, '**', pattern), recursive=True))
+        else:
+            paths.extend(glob.glob(item, recursive=True))
+    # Excel lock files (~$name.xlsx) are not workbooks
+    paths = [p for p in paths if not os.path.basename(p).startswith('~$')]
+    return sorted(set(os.path.abspath(p) for p in paths))
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def analyze_sheet(path, sheet, threshold, frozen_weeks):
+    # Runs in a worker process; returns the critical rows of one sheet and timings
+    start = time.perf_counter()
+    df = read_sheet(path, sheet)
+    parsed = time.perf_counter()
+
+    critical = None
+    if 'Production line' in df.columns:
+        sheet_index = SheetIndex(df)
+        if sheet_index.wk_cols:
+            critical = sheet_index.critical(threshold, frozen_weeks).data
+            critical.insert(0, 'Sheet', sheet)
+    done = time.perf_counter()
+
+    return {
+        'sheet': sheet,
+        'rows': len(df),
+        'critical': critical,
+        'parse_seconds': parsed - start,
+        'analysis_seconds': done - parsed,
+    }
+
+
+def write_table(df, path, fmt):
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def output_names(paths):
+    # <stem>, disambiguated with a path hash when two inputs share a file name
+    stems = {}
+    for path in paths:
+        stems.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+    names = {}
+    for stem, group in stems.items():
+        for path in group:
+            if len(group) == 1:
+                names[path] = stem
+            else:
+                names[path] = f"{stem}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+    return names
+
+
+def finish_workbook(path, name, results, args):
+    sheets = sorted(results, key=lambda r: r['sheet_order'])
+    frames = [r['critical'] for r in sheets if r['critical'] is not None]
+    critical_data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=['Sheet', 'Material', 'Production line', 'Deficit quantity', 'Week', 'Fluctuation']
+    )
+
+    summaries = []
+    for r in sheets:
+        if r['critical'] is not None:
+            summary = project_summary(r['critical'])
+            summary.insert(0, 'Sheet', r['sheet'])
+            summaries.append(summary)
+    summary = pd.concat(summaries, ignore_index=True) if summaries else project_summary(critical_data)
+
+    critical_path = os.path.join(args.output_dir, f"{name}.critical.{args.format}")
+    summary_path = os.path.join(args.output_dir, f"{name}.summary.{args.format}")
+    write_table(critical_data, critical_path, args.format)
+    write_table(summary, summary_path, args.format)
+
+    return {
+        'sheets': len(sheets),
+        'rows': sum(r['rows'] for r in sheets),
+        'critical_rows': len(critical_data),
+        'parse_seconds': round(sum(r['parse_seconds'] for r in sheets), 3),
+        'analysis_seconds': round(sum(r['analysis_seconds'] for r in sheets), 3),
+        'outputs': [critical_path, summary_path],
+    }
+
+
+def run(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    settings = {'threshold': args.threshold, 'frozen_weeks': args.frozen_weeks, 'format': args.format}
+
+    paths = find_workbooks(args.inputs)
+    if not paths:
+        print("No workbooks found.", file=sys.stderr)
+        return 1
+    names = output_names(paths)
+
+    # Skip files whose content and settings match the last run
+    todo = {}
+    for path in paths:
+        digest = file_sha256(path)
+        previous = manifest.get(path)
+        if (
+            not args.force
+            and previous
+            and previous.get('sha256') == digest
+            and previous.get('settings') == settings
+            and all(os.path.exists(p) for p in previous.get('outputs', []))
+        ):
+            print(f"[skip] {path} (unchanged)")
+            continue
+        todo[path] = digest
+
+    failures = 0
+    started = {path: time.perf_counter() for path in todo}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {}
+        pending = {}
+        for path in todo:
+            try:
+                names_in_file = sheet_names(path)
+            except Exception as e:
+                print(f"[fail] {path}: {e}", file=sys.stderr)
+                failures += 1
+                continue
+            pending[path] = {'remaining': len(names_in_file), 'results': [], 'failed': False}
+            for order, sheet in enumerate(names_in_file):
+                future = pool.submit(analyze_sheet, path, sheet, args.threshold, args.frozen_weeks)
+                futures[future] = (path, order)
+
+        for future in as_completed(futures):
+            path, order = futures[future]
+            state = pending[path]
+            state['remaining'] -= 1
+            try:
+                result = future.result()
+                result['sheet_order'] = order
+                state['results'].append(result)
+            except Exception as e:
+                print(f"[fail] {path}: {e}", file=sys.stderr)
+                state['failed'] = True
+            # A workbook is written out once all of its sheets are back
+            if state['remaining']:
+                continue
+            if state['failed']:
+                failures += 1
+                continue
+
+            stats = finish_workbook(path, names[path], state['results'], args)
+            wall = time.perf_counter() - started[path]
+            print(
+                f"[done] {path}: {stats['sheets']} sheets, {stats['rows']:,} rows, "
+                f"{stats['critical_rows']:,} critical rows, parse {stats['parse_seconds']:.2f}s, "
+                f"analysis {stats['analysis_seconds']:.2f}s, wall {wall:.2f}s"
+            )
+            manifest[path] = {
+                'sha256': todo[path],
+                'settings': settings,
+                'processed_at': datetime.now().isoformat(timespec='seconds'),
+                'wall_seconds': round(wall, 3),
+                **stats,
+            }
+            save_manifest(manifest_path, manifest)
+
+    return 1 if failures else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Batch frozen-zone critical-part detection over Excel planning workbooks."
+    )
+    parser.add_argument('inputs', nargs='+', help="Directories or glob patterns of .xlsx/.xlsm files")
+    parser.add_argument('-o', '--output-dir', default='reports', help="Where reports and the manifest go")
+    parser.add_argument('-f', '--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: one per core)")
+    parser.add_argument('--threshold', type=float, default=CRITICAL_THRESHOLD)
+    parser.add_argument('--frozen-weeks', type=int, default=FROZEN_WEEKS)
+    parser.add_argument('--force', action='store_true', help="Reprocess files even if unchanged")
+    args = parser.parse_args(argv)
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet needs pyarrow installed")
+    return args
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args()))
@@ -0,0 +1,36 @@
+import argparse
+import json
+
+# Side-by-side comparison of two benchmark result files:
+#
+#   python -m benchmarks.compare base.json head.json
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--metric', default='min_seconds', choices=['min_seconds', 'median_seconds'])
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    if base.get('config') != head.get('config'):
+        print("warning: the two runs used different configurations")
+
+    print(f"{'stage':<24}{base.get('commit') or 'base':>12}{head.get('commit') or 'head':>12}{'ratio':>9}")
+    for stage in dict.fromkeys(list(base['stages']) + list(head['stages'])):
+        before = base['stages'].get(stage, {}).get(args.metric)
+        after = head['stages'].get(stage, {}).get(args.metric)
+        ratio = f"{after / before:8.2f}x" if before and after else f"{'-':>9}"
+        before_text = f"{before:11.3f}s" if before is not None else f"{'-':>12}"
+        after_text = f"{after:11.3f}s" if after is not None else f"{'-':>12}"
+        print(f"{stage:<24}{before_text}{after_text}{ratio}")
+
+
+if __name__ == '__main__':
+    main()
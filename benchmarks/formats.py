@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+from openpyxl import Workbook
+
+from excel_reader import read_sheet
+from fluctuation import SheetIndex
+from normalize import unparsed_cells
+
+# Value-format check for excel_reader.read_sheet: small workbooks whose week
+# columns hold text instead of numbers are read, normalized and indexed the
+# way both frontends do it. Each case lists the expected wk01 values; the
+# process exits with status 1 when any case fails, so the check can gate CI.
+#
+#   python -m benchmarks.formats
+
+CASES = {
+    # Every week cell is text, so pandas 3 infers the column as str, not object
+    'all percent': (['25%', '-12.5%', '3%'], [0.25, -0.125, 0.03], 0),
+    'percent and stray text': (['25%', 'x', '-10%'], [0.25, np.nan, -0.1], 1),
+    'decimal comma': (['0,25', '-0,125', '12,5%'], [0.25, -0.125, 0.125], 0),
+    'numbers and text': ([0.25, '15%', None], [0.25, 0.15, np.nan], 0),
+}
+
+
+def write_case(path, week_values):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(['Material', 'Production line', 'Deficit quantity', 'wk01', 'wk02'])
+    for i, value in enumerate(week_values):
+        ws.append([f"MAT-{i:03d}", "Project A", '1,5', value, value])
+    wb.save(path)
+
+
+def check_case(path, expected, expected_unparsed):
+    df = read_sheet(path, "Sheet1")
+    values = df['wk01'].to_numpy(dtype=float)
+    problems = []
+    if not np.allclose(values, expected, equal_nan=True):
+        problems.append(f"wk01 read as {values.tolist()}, expected {expected}")
+    n_unparsed, _ = unparsed_cells(df)
+    # The same cells are counted in wk01 and wk02
+    if n_unparsed != 2 * expected_unparsed:
+        problems.append(f"{n_unparsed} unparsed cells, expected {2 * expected_unparsed}")
+    # The sheet index and the default critical analysis must build from the frame
+    SheetIndex(df).critical()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that text value columns are normalized on read.")
+    parser.parse_args(argv)
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (week_values, expected, expected_unparsed) in CASES.items():
+            path = os.path.join(tmp, 'case.xlsx')
+            write_case(path, week_values)
+            try:
+                problems = check_case(path, expected, expected_unparsed)
+            except Exception as e:
+                problems = [f"{type(e).__name__}: {e}"]
+            print(f"  {name:<24} {'OK' if not problems else 'FAILED'}")
+            for problem in problems:
+                print(f"    {problem}")
+            failed += bool(problems)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
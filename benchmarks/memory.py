@@ -0,0 +1,124 @@
+import argparse
+import ctypes
+import gc
+import json
+import resource
+import sys
+import time
+
+from benchmarks.synthetic import synthetic_frame
+from detail_index import DetailIndex
+from excel_cache import frame_nbytes
+from fluctuation import SheetIndex, compact_frame
+from timing import current_rss
+
+# Memory budget check for the compact sheet representation.
+#
+#   python -m benchmarks.memory --rows 1000000 --weeks 26 --budget-mb 1024
+#
+# Builds a sheet of --rows materials in memory (Excel parsing is not part of
+# this check), compacts it the way excel_reader.read_sheet does, then builds
+# the sheet index, the all-project critical analysis, the largest project's
+# long frame and the details-table index. The budget is a ceiling on the
+# peak resident size of the whole process, interpreter and libraries included,
+# so it is what a user's machine actually has to provide; the process exits
+# with status 1 when it is exceeded, so the check can gate CI.
+#
+# Reference point (Linux, pandas 3, numpy 2): 1M rows x 26 weeks peaks around
+# 800 MB and retains about 530 MB for the sheet and its indexes, against a 1 GB
+# ceiling.
+
+
+def release_free_memory():
+    # Return freed heap pages to the OS (glibc only) so RSS reflects live data
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def measure(rows, projects, weeks, seed):
+    release_free_memory()
+    baseline = current_rss()
+    stages = {}
+
+    def mark(name, start):
+        release_free_memory()
+        rss = current_rss()
+        stages[name] = {
+            'seconds': round(time.perf_counter() - start, 3),
+            'rss_above_baseline_mb': round((rss - baseline) / 1e6, 1) if rss and baseline else None,
+        }
+        print(f"  {name:<18} {stages[name]['seconds']:7.2f}s   "
+              f"RSS +{stages[name]['rss_above_baseline_mb']} MB")
+
+    start = time.perf_counter()
+    raw = synthetic_frame(rows, projects, weeks, seed=seed)
+    raw_bytes = frame_nbytes(raw)
+    df = compact_frame(raw)
+    del raw
+    mark('compact_frame', start)
+
+    start = time.perf_counter()
+    sheet_index = SheetIndex(df)
+    mark('sheet_index', start)
+
+    start = time.perf_counter()
+    critical = sheet_index.critical()
+    mark('critical', start)
+
+    start = time.perf_counter()
+    sizes = {p: len(sheet_index.project_frame(p)) for p in sheet_index.projects}
+    project_long = sheet_index.project_long(max(sizes, key=sizes.get))
+    mark('project_long', start)
+
+    start = time.perf_counter()
+    detail_index = DetailIndex(critical.data)
+    mark('detail_index', start)
+
+    release_free_memory()
+    retained = current_rss() - baseline
+    return {
+        'raw_frame_mb': round(raw_bytes / 1e6, 1),
+        'compact_frame_mb': round(frame_nbytes(df) / 1e6, 1),
+        'sheet_index_mb': round(sheet_index.nbytes / 1e6, 1),
+        'project_long_rows': len(project_long),
+        'critical_rows': len(detail_index),
+        'retained_mb': round(retained / 1e6, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3, 1),
+        'stages': stages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that a large sheet fits a fixed memory budget.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=26)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget-mb', type=float, default=1024.0, help="Ceiling on peak RSS")
+    parser.add_argument('-o', '--output', help="Also write the measurements as JSON")
+    args = parser.parse_args(argv)
+
+    if current_rss() is None:
+        sys.exit("Resident memory cannot be measured on this platform.")
+
+    print(f"Memory budget check: {args.rows:,} rows x {args.weeks} weeks, budget {args.budget_mb:,.0f} MB")
+    result = measure(args.rows, args.projects, args.weeks, args.seed)
+    result['config'] = vars(args)
+    result['within_budget'] = result['peak_rss_mb'] <= args.budget_mb
+    print(f"Frame {result['raw_frame_mb']} MB as read, {result['compact_frame_mb']} MB compact; "
+          f"index structures {result['sheet_index_mb']} MB")
+    print(f"Peak RSS {result['peak_rss_mb']} MB of {args.budget_mb:,.0f} MB budget, "
+          f"{result['retained_mb']} MB retained: {'OK' if result['within_budget'] else 'OVER BUDGET'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    if not result['within_budget']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from benchmarks.synthetic import write_workbook
+from charts import (
+    MODE_AUTO, critical_bar_figure, critical_heatmap_figure, fluctuation_figure, project_overview_figure,
+    project_week_heatmap_figure
+)
+from excel_reader import read_sheet, sheet_names
+from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS, ID_COLUMNS, SheetIndex, WeekCube, critical_parts
+
+# Stage-by-stage benchmark of the analysis pipeline on a synthetic workbook.
+#
+#   python -m benchmarks.run --materials 50000 --projects 20 --weeks 26 -o results.json
+#   python -m benchmarks.compare base.json head.json
+#
+# Each stage is repeated and the min / median wall time recorded. With --legacy
+# the original read_excel + melt pipeline is timed alongside for comparison.
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_stage(fn, repeat):
+    # Returns (timings, last result)
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def legacy_melt(df, wk_cols, project):
+    # The melt -> concat -> Categorical -> sort pipeline the frontends used to run
+    df_selected = df[df['Production line'] == project].copy()
+    df_long = df_selected.melt(id_vars=ID_COLUMNS, value_vars=wk_cols, var_name='Week', value_name='Fluctuation')
+    deficit_rows = df_selected[ID_COLUMNS].copy()
+    deficit_rows['Week'] = 'Deficit'
+    deficit_rows['Fluctuation'] = deficit_rows['Deficit quantity']
+    df_long = pd.concat([deficit_rows, df_long], ignore_index=True)
+    df_long['Week'] = pd.Categorical(df_long['Week'], categories=['Deficit'] + wk_cols, ordered=True)
+    return df_long.sort_values(['Material', 'Week'])
+
+
+def legacy_critical(df, wk_cols):
+    all_frozen_data = df.melt(id_vars=ID_COLUMNS, value_vars=wk_cols, var_name='Week', value_name='Fluctuation')
+    frozen_data = all_frozen_data[all_frozen_data['Week'].isin(wk_cols[:FROZEN_WEEKS])].copy()
+    return frozen_data[frozen_data['Fluctuation'] > CRITICAL_THRESHOLD].copy()
+
+
+def run_benchmarks(path, sheet, repeat, legacy=False, chart_mode=MODE_AUTO):
+    stages = {}
+
+    def record(name, fn, times=repeat):
+        timings, result = time_stage(fn, times)
+        stages[name] = {
+            'min_seconds': round(min(timings), 6),
+            'median_seconds': round(statistics.median(timings), 6),
+            'repeat': len(timings),
+        }
+        print(f"  {name:<26} min {min(timings):8.3f}s   median {statistics.median(timings):8.3f}s")
+        return result
+
+    df = record('excel_parse', lambda: read_sheet(path, sheet))
+    sheet_index = record('sheet_index', lambda: SheetIndex(df))
+    wk_cols = sheet_index.wk_cols
+
+    # The largest project is the worst case for the per-project chart
+    sizes = {p: sheet_index.project_slice(p).stop - sheet_index.project_slice(p).start
+             for p in sheet_index.projects}
+    project = max(sizes, key=sizes.get)
+
+    record('reshape_long', lambda: sheet_index.project_long(project))
+    critical = record('critical_detection', lambda: critical_parts(df, wk_cols))
+    record('bar_figure', lambda: critical_bar_figure(critical.summary))
+    heat = record('pivot_heatmap', lambda: critical_heatmap_figure(critical.data))
+    # The project x week cube is built with the index; a fresh cube per repeat
+    # (at a threshold the index has not built yet) times the aggregation itself
+    record('week_cube', lambda: WeekCube(
+        sheet_index.matrix, sheet_index._groups, sheet_index.material_codes, wk_cols, threshold=0.25))
+    record('cube_metrics', lambda: sheet_index.metrics())
+    project_heat = record('project_week_heatmap', lambda: project_week_heatmap_figure(
+        *sheet_index.project_week_heatmap()))
+    record('overview_figure', lambda: project_overview_figure(sheet_index.cube().overview(), wk_cols))
+    fig = record('line_figure', lambda: fluctuation_figure(
+        sheet_index.project_frame(project), wk_cols, project,
+        matrix=sheet_index.project_matrix(project), mode=chart_mode))
+    record('line_figure_json', lambda: fig.to_json())
+    record('line_figure_html', lambda: fig.to_html(include_plotlyjs=False))
+    record('heatmap_html', lambda: heat.to_html(include_plotlyjs=False))
+    record('project_week_heatmap_html', lambda: project_heat.to_html(include_plotlyjs=False))
+
+    if legacy:
+        legacy_df = record('legacy_read_excel', lambda: pd.read_excel(path, sheet_name=sheet))
+        record('legacy_melt_reshape', lambda: legacy_melt(legacy_df, wk_cols, project))
+        record('legacy_critical_melt', lambda: legacy_critical(legacy_df, wk_cols))
+
+    return stages, {
+        'rows': len(df),
+        'projects': len(sheet_index.projects),
+        'weeks': len(wk_cols),
+        'largest_project_rows': sizes[project],
+        'critical_rows': len(critical.data),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fluctuation pipeline stage by stage.")
+    parser.add_argument('--workbook', help="Existing workbook to benchmark instead of a synthetic one")
+    parser.add_argument('--sheet', help="Sheet to benchmark (default: first sheet)")
+    parser.add_argument('--materials', type=int, default=20000)
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=20)
+    parser.add_argument('--sheets', type=int, default=1)
+    parser.add_argument('--nan-ratio', type=float, default=0.05)
+    parser.add_argument('--outlier-ratio', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--chart-mode', default=MODE_AUTO)
+    parser.add_argument('--legacy', action='store_true', help="Also time the original melt-based pipeline")
+    parser.add_argument('-o', '--output', help="Results JSON path (default: benchmarks/results/<commit>-<time>.json)")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.workbook
+        if path is None:
+            path = os.path.join(tmp, 'synthetic.xlsx')
+            start = time.perf_counter()
+            write_workbook(path, args.materials, args.projects, args.weeks, args.sheets,
+                           args.nan_ratio, args.outlier_ratio, args.seed)
+            print(f"Generated {path} in {time.perf_counter() - start:.1f}s "
+                  f"({os.path.getsize(path) / 1e6:.1f} MB)")
+        sheet = args.sheet or 'Sheet1'
+        if args.workbook and not args.sheet:
+            sheet = sheet_names(path)[0]
+
+        print(f"Benchmarking sheet '{sheet}' (commit {commit or 'unknown'})")
+        stages, data = run_benchmarks(path, sheet, args.repeat, args.legacy, args.chart_mode)
+        file_size = os.path.getsize(path)
+
+    results = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+        },
+        'config': {
+            'workbook': args.workbook,
+            'sheet': sheet,
+            'materials': args.materials,
+            'projects': args.projects,
+            'weeks': args.weeks,
+            'sheets': args.sheets,
+            'nan_ratio': args.nan_ratio,
+            'outlier_ratio': args.outlier_ratio,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'chart_mode': args.chart_mode,
+            'file_bytes': file_size,
+        },
+        'data': data,
+        'stages': stages,
+    }
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(results_dir, f"{commit or 'nocommit'}-{stamp}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
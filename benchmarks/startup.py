@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Cold start benchmark of the desktop app. Each run starts a fresh Python
+# process that opens the main window and reports when it was first painted and
+# when the chart's web engine was ready.
+#
+#   python -m benchmarks.startup --repeat 5 -o startup.json
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.startup
+#
+# "first_paint" is measured by the parent from process launch, so it includes
+# interpreter startup and every import made before the window appears.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['numpy', 'pandas', 'plotly', 'openpyxl', 'PySide6.QtWebEngineWidgets']
+MARKS = ['first_paint', 'chart_view_ready']
+
+
+def child(timeout):
+    # Runs inside the measured process; prints one JSON line per mark
+    start = time.perf_counter()
+
+    def emit(mark, **extra):
+        print(json.dumps({'mark': mark, 'seconds': time.perf_counter() - start, **extra}), flush=True)
+
+    sys.path.insert(0, REPO_ROOT)
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from DesktopDataViz import FluctuationApp, create_application
+    emit('imported')
+
+    app = create_application(sys.argv[:1])
+    window = FluctuationApp()
+    emit('window_created')
+
+    class FirstPaint(QObject):
+        def __init__(self):
+            super().__init__()
+            self.seen = False
+
+        def eventFilter(self, obj, event):
+            if obj is window and event.type() == QEvent.Paint and not self.seen:
+                self.seen = True
+                emit('first_paint', heavy_modules=[m for m in HEAVY_MODULES if m in sys.modules])
+            return False
+
+    probe = FirstPaint()
+    window.installEventFilter(probe)
+    window.chart_view_ready.connect(lambda: (
+        emit('chart_view_ready', available=window.chart_view is not None), app.quit()
+    ))
+    QTimer.singleShot(int(timeout * 1000), app.quit)
+    window.show()
+    app.exec()
+
+
+def run_once(timeout):
+    # Wall time from process launch to each mark, as seen by the parent
+    launched = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.startup', '--child', '--timeout', str(timeout)],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    run = {}
+    for line in proc.stdout:
+        received = time.perf_counter() - launched
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        mark = record.pop('mark')
+        run[mark] = {'wall_seconds': round(received, 4), 'in_process_seconds': round(record.pop('seconds'), 4),
+                     **record}
+    proc.wait()
+    run['exit_seconds'] = round(time.perf_counter() - launched, 4)
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure desktop cold start (time to first paint).")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=30.0, help="Give up on a run after this many seconds")
+    parser.add_argument('-o', '--output', help="Results JSON path (default: benchmarks/results/startup-<commit>-<time>.json)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.timeout)
+        return
+
+    from benchmarks.run import git_commit
+    commit = git_commit()
+    print(f"Measuring desktop startup (commit {commit or 'unknown'}, {args.repeat} runs)")
+    runs = []
+    for i in range(args.repeat):
+        run = run_once(args.timeout)
+        runs.append(run)
+        marks = "   ".join(
+            f"{mark} {run[mark]['wall_seconds']:.3f}s" for mark in MARKS if mark in run
+        )
+        print(f"  run {i + 1}: {marks}")
+
+    summary = {}
+    for mark in MARKS:
+        values = [run[mark]['wall_seconds'] for run in runs if mark in run]
+        if values:
+            summary[mark] = {
+                'min_seconds': round(min(values), 4),
+                'median_seconds': round(statistics.median(values), 4),
+                'repeat': len(values),
+            }
+
+    results = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt_platform': os.environ.get('QT_QPA_PLATFORM'),
+        },
+        'config': {'repeat': args.repeat, 'timeout': args.timeout},
+        'stages': summary,
+        'runs': runs,
+    }
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(results_dir, f"startup-{commit or 'nocommit'}-{stamp}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
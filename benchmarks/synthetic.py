@@ -0,0 +1,84 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Synthetic planning workbooks with the schema both frontends expect:
+# Material, Production line, Deficit quantity, wk01..wkNN. Fluctuations are
+# fractions (0.15 == 15%) with a share of blanks and a share of outliers.
+#
+#   python -m benchmarks.synthetic plan.xlsx --materials 200000 --projects 40 --weeks 26
+
+
+def synthetic_rows(n_materials, n_projects, n_weeks, nan_ratio=0.05, outlier_ratio=0.01, seed=0):
+    # Yields one list per row, header first
+    rng = np.random.default_rng(seed)
+    yield ['Material', 'Production line', 'Deficit quantity'] + [f"wk{w:02d}" for w in range(1, n_weeks + 1)]
+
+    projects = np.array([f"Project {p:03d}" for p in range(n_projects)], dtype=object)
+    chunk = 10000
+    for start in range(0, n_materials, chunk):
+        n = min(chunk, n_materials - start)
+        values = rng.normal(0.0, 0.12, size=(n, n_weeks + 1))
+        outliers = rng.random((n, n_weeks + 1)) < outlier_ratio
+        values[outliers] = rng.choice([-1.0, 1.0], size=outliers.sum()) * rng.uniform(0.5, 3.0, outliers.sum())
+        values[rng.random((n, n_weeks + 1)) < nan_ratio] = np.nan
+        owners = projects[rng.integers(0, n_projects, size=n)]
+
+        for i in range(n):
+            row = values[i].round(4).tolist()
+            yield [f"MAT-{start + i:07d}", owners[i]] + [None if v != v else v for v in row]
+
+
+def synthetic_frame(n_materials, n_projects, n_weeks, nan_ratio=0.05, outlier_ratio=0.01, seed=0):
+    # The same data as a DataFrame with the dtypes a plain read would give
+    # (object identifiers, float64 values), for benchmarks that skip Excel
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.0, 0.12, size=(n_materials, n_weeks + 1))
+    outliers = rng.random(values.shape) < outlier_ratio
+    values[outliers] = rng.choice([-1.0, 1.0], size=outliers.sum()) * rng.uniform(0.5, 3.0, outliers.sum())
+    values[rng.random(values.shape) < nan_ratio] = np.nan
+    values = values.round(4)
+
+    projects = np.array([f"Project {p:03d}" for p in range(n_projects)], dtype=object)
+    columns = {
+        'Material': np.array([f"MAT-{i:07d}" for i in range(n_materials)], dtype=object),
+        'Production line': projects[rng.integers(0, n_projects, size=n_materials)],
+        'Deficit quantity': values[:, 0],
+    }
+    for w in range(1, n_weeks + 1):
+        columns[f"wk{w:02d}"] = values[:, w]
+    return pd.DataFrame(columns)
+
+
+def write_workbook(path, n_materials=10000, n_projects=10, n_weeks=20, n_sheets=1,
+                   nan_ratio=0.05, outlier_ratio=0.01, seed=0):
+    # Written in openpyxl write-only mode, so generation itself stays streaming
+    wb = Workbook(write_only=True)
+    for sheet in range(n_sheets):
+        ws = wb.create_sheet(f"Sheet{sheet + 1}")
+        for row in synthetic_rows(n_materials, n_projects, n_weeks, nan_ratio, outlier_ratio, seed + sheet):
+            ws.append(row)
+    wb.save(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic fluctuation workbook.")
+    parser.add_argument('path', help="Output .xlsx path")
+    parser.add_argument('--materials', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=20)
+    parser.add_argument('--sheets', type=int, default=1)
+    parser.add_argument('--nan-ratio', type=float, default=0.05)
+    parser.add_argument('--outlier-ratio', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_workbook(args.path, args.materials, args.projects, args.weeks, args.sheets,
+                   args.nan_ratio, args.outlier_ratio, args.seed)
+    print(f"Wrote {args.path}")
+
+
+if __name__ == '__main__':
+    main()
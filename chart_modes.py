@@ -0,0 +1,14 @@
+# Chart rendering modes, kept free of heavy imports so the desktop window can
+# build its controls before pandas and plotly are loaded. See charts.py.
+
+MODE_AUTO = 'auto'
+MODE_LINES = 'lines'
+MODE_WEBGL = 'webgl'
+MODE_ENVELOPE = 'envelope'
+CHART_MODES = [MODE_AUTO, MODE_LINES, MODE_WEBGL, MODE_ENVELOPE]
+MODE_LABELS = {
+    MODE_AUTO: 'Auto',
+    MODE_LINES: 'Lines',
+    MODE_WEBGL: 'WebGL',
+    MODE_ENVELOPE: 'Envelope',
+}
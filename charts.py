@@ -0,0 +1,311 @@
+import warnings
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from chart_modes import CHART_MODES, MODE_AUTO, MODE_ENVELOPE, MODE_LABELS, MODE_LINES, MODE_WEBGL
+from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS, long_format, week_matrix
+
+# Figure builders shared by app.py and DesktopDataViz.py.
+#
+# The per-material fluctuation chart has three rendering modes:
+#   "lines"    - one SVG trace per material (px.line), fine for small projects
+#   "webgl"    - materials packed into a handful of Scattergl traces, separated
+#                by NaN gaps, so trace count no longer grows with material count
+#   "envelope" - min/max and percentile bands per week, with the top-K most
+#                volatile materials drawn on top
+# "auto" picks one from the number of materials.
+
+# Heatmap drill-down shows this many parts per page
+HEATMAP_PAGE_SIZE = 25
+
+WEBGL_THRESHOLD = 50
+ENVELOPE_THRESHOLD = 2000
+PACKED_TRACES = 8
+TOP_K = 10
+
+
+def resolve_mode(n_materials, mode=MODE_AUTO, webgl_threshold=WEBGL_THRESHOLD,
+                 envelope_threshold=ENVELOPE_THRESHOLD):
+    if mode != MODE_AUTO:
+        return mode
+    if n_materials > envelope_threshold:
+        return MODE_ENVELOPE
+    if n_materials > webgl_threshold:
+        return MODE_WEBGL
+    return MODE_LINES
+
+
+def threshold_shapes(wk_cols, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+    # Dashed lines at +/- threshold and the shaded frozen zone
+    shapes = [
+        dict(
+            type='line',
+            xref='paper', x0=0, x1=1,
+            yref='y', y0=threshold, y1=threshold,
+            line=dict(color='red', width=2, dash='dash')
+        ),
+        dict(
+            type='line',
+            xref='paper', x0=0, x1=1,
+            yref='y', y0=-threshold, y1=-threshold,
+            line=dict(color='red', width=2, dash='dash')
+        )
+    ]
+    if frozen_weeks and len(wk_cols) >= frozen_weeks:
+        shapes.append(
+            dict(
+                type='rect',
+                xref='x',
+                yref='paper',
+                x0=wk_cols[0],
+                x1=wk_cols[frozen_weeks - 1],
+                y0=0,
+                y1=1,
+                fillcolor='rgba(255, 0, 0, 0.1)',
+                line=dict(width=0),
+                layer='below'
+            )
+        )
+    return shapes
+
+
+def fluctuation_figure(project_frame, wk_cols, project, matrix=None, mode=MODE_AUTO,
+                       webgl_threshold=WEBGL_THRESHOLD, envelope_threshold=ENVELOPE_THRESHOLD,
+                       top_k=TOP_K, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+    # ``matrix`` is the project's (materials x weeks) block if already extracted
+    if matrix is None:
+        matrix = week_matrix(project_frame, wk_cols)
+    mode = resolve_mode(len(project_frame), mode, webgl_threshold, envelope_threshold)
+    title = f"Fluctuation Over Weeks - {project}"
+
+    if mode == MODE_LINES:
+        df_long = long_format(project_frame, wk_cols, matrix)
+        fig = px.line(
+            df_long,
+            x='Week',
+            y='Fluctuation',
+            color='Material',
+            markers=True,
+            title=title,
+            hover_data=['Deficit quantity'],
+            height=600,
+            width=1100
+        )
+    else:
+        week_order = ['Deficit'] + list(wk_cols)
+        deficit = np.asarray(project_frame['Deficit quantity'].to_numpy(), dtype=float)
+        values = np.column_stack([deficit, matrix])
+        materials = project_frame['Material'].to_numpy()
+        if mode == MODE_WEBGL:
+            traces = packed_traces(values, materials, deficit, week_order)
+        else:
+            traces = envelope_traces(values, materials, week_order, top_k)
+        fig = go.Figure(traces)
+        fig.update_layout(
+            title=title,
+            height=600,
+            width=1100,
+            xaxis=dict(type='category', categoryorder='array', categoryarray=week_order, title='Week'),
+            yaxis_title='Fluctuation',
+        )
+
+    fig.update_layout(
+        yaxis=dict(tickformat=".0%"),
+        xaxis_tickangle=45,
+        shapes=threshold_shapes(wk_cols, threshold, frozen_weeks)
+    )
+    return fig
+
+
+def critical_bar_figure(summary, threshold=CRITICAL_THRESHOLD):
+    # Maximum fluctuation per critical part, coloured by project
+    fig = px.bar(
+        summary,
+        x='Material',
+        y='Fluctuation',
+        color='Production line',
+        title='Maximum Fluctuation by Critical Part',
+        labels={'Fluctuation': 'Max Fluctuation'},
+        height=400
+    )
+    fig.add_hline(y=threshold, line_dash="dash", line_color="red")
+    return fig
+
+
+def critical_heatmap_figure(critical_data):
+    # Heatmap by project and week
+    pivot_table = critical_data.pivot_table(
+        index=['Production line', 'Material'],
+        columns='Week',
+        values='Fluctuation',
+        aggfunc='max'
+    )
+    fig = px.imshow(
+        pivot_table,
+        title='Critical Parts Heatmap by Project',
+        color_continuous_scale='RdYlBu_r',
+        aspect='auto',
+        labels={'color': 'Fluctuation'}
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def project_week_heatmap_figure(peaks, counts):
+    # Project x week overview from SheetIndex.project_week_heatmap; the payload
+    # grows with projects x weeks, not with the number of critical parts
+    fig = go.Figure(go.Heatmap(
+        z=peaks.to_numpy(),
+        x=list(peaks.columns),
+        y=[str(p) for p in peaks.index],
+        customdata=counts.to_numpy(),
+        colorscale='RdYlBu_r',
+        colorbar={'title': 'Fluctuation', 'tickformat': '.0%'},
+        hovertemplate="%{y} / %{x}<br>Max fluctuation %{z:.1%}<br>%{customdata} critical parts<extra></extra>",
+    ))
+    fig.update_layout(title='Critical Fluctuation by Project and Week', height=400)
+    fig.update_yaxes(autorange='reversed')
+    return fig
+
+
+def project_overview_figure(overview, wk_cols, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+    # Highest fluctuation per week of every project, from WeekCube.overview();
+    # one point per project and week, whatever the number of materials
+    fig = px.line(
+        overview.assign(**{'Production line': overview['Production line'].astype(str)}),
+        x='Week',
+        y='Max',
+        color='Production line',
+        markers=True,
+        hover_data={'Min': ':.1%', 'Values': True, 'Parts': True, 'Critical cells': True},
+        labels={'Max': 'Max Fluctuation'},
+        title='Highest Fluctuation per Week - All Projects',
+        height=450
+    )
+    fig.update_layout(shapes=threshold_shapes(wk_cols, threshold, frozen_weeks))
+    fig.update_yaxes(tickformat='.0%')
+    return fig
+
+
+def project_parts_heatmap_figure(materials, values, weeks, project, page=0, page_size=HEATMAP_PAGE_SIZE):
+    # One page of a project's critical parts (from SheetIndex.project_critical_rows)
+    start = page * page_size
+    rows = slice(start, start + page_size)
+    n_pages = max(1, -(-len(materials) // page_size))
+    fig = go.Figure(go.Heatmap(
+        z=values[rows],
+        x=list(weeks),
+        y=[str(m) for m in materials[rows]],
+        colorscale='RdYlBu_r',
+        colorbar={'title': 'Fluctuation', 'tickformat': '.0%'},
+        hovertemplate="%{y} / %{x}<br>Fluctuation %{z:.1%}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f'Critical Parts of {project} (page {page + 1} of {n_pages}, most volatile first)',
+        height=400
+    )
+    fig.update_yaxes(autorange='reversed', type='category')
+    return fig
+
+
+def sweep_figure(sweep, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+    # Critical part count per threshold, one line per frozen-zone length
+    # (from SheetIndex.threshold_sweep); the current setting is marked
+    fig = px.line(
+        sweep.assign(**{'Frozen weeks': sweep['Frozen weeks'].astype(str)}),
+        x='Threshold',
+        y='Critical parts',
+        color='Frozen weeks',
+        markers=True,
+        hover_data=['Projects affected', 'Worst part'],
+        title='Critical Parts by Threshold and Frozen-Zone Length',
+        height=400
+    )
+    fig.add_vline(x=threshold, line_dash="dash", line_color="red",
+                  annotation_text=f"current ({threshold:.0%}, {frozen_weeks} weeks)")
+    fig.update_xaxes(tickformat='.0%')
+    return fig
+
+
+def part_trend_figure(trend, material, threshold=CRITICAL_THRESHOLD):
+    # Highest frozen-zone fluctuation of one part per snapshot (see history.py)
+    fig = px.line(
+        trend,
+        x='Snapshot date',
+        y='Fluctuation',
+        color='Production line',
+        markers=True,
+        title=f'Frozen-Zone Fluctuation of {material} Across Snapshots',
+        labels={'Fluctuation': 'Max Fluctuation'},
+        height=350
+    )
+    fig.add_hline(y=threshold, line_dash="dash", line_color="red")
+    fig.update_yaxes(tickformat='.0%')
+    return fig
+
+
+def packed_traces(values, materials, deficit, week_order, n_traces=PACKED_TRACES):
+    # Materials are dealt round-robin into a few Scattergl traces; each material
+    # contributes one run of points followed by a NaN so lines do not join up
+    n_materials, n_weeks = values.shape
+    n_traces = max(1, min(n_traces, n_materials))
+    colors = px.colors.qualitative.Plotly
+    gap_x = np.append(np.asarray(week_order, dtype=object), week_order[-1])
+
+    traces = []
+    for group in range(n_traces):
+        rows = np.arange(group, n_materials, n_traces)
+        y = np.column_stack([values[rows], np.full(len(rows), np.nan)]).ravel()
+        names = np.repeat(materials[rows].astype(str), n_weeks + 1)
+        traces.append(go.Scattergl(
+            x=np.tile(gap_x, len(rows)),
+            y=y,
+            mode='lines+markers',
+            line=dict(width=1, color=colors[group % len(colors)]),
+            marker=dict(size=4),
+            text=names,
+            customdata=np.repeat(deficit[rows], n_weeks + 1),
+            hovertemplate=(
+                "Material=%{text}<br>Week=%{x}<br>Fluctuation=%{y}"
+                "<br>Deficit quantity=%{customdata}<extra></extra>"
+            ),
+            connectgaps=False,
+            showlegend=False,
+        ))
+    return traces
+
+
+def envelope_traces(values, materials, week_order, top_k=TOP_K):
+    # Per-week distribution bands plus the most volatile materials
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        low, p10, median, p90, high = np.nanpercentile(values, [0, 10, 50, 90, 100], axis=0)
+        volatility = np.nanstd(values, axis=1)
+
+    def band(lower, upper, name, color):
+        return [
+            go.Scatter(x=week_order, y=upper, mode='lines', line=dict(width=0),
+                       hoverinfo='skip', showlegend=False, legendgroup=name),
+            go.Scatter(x=week_order, y=lower, mode='lines', line=dict(width=0),
+                       fill='tonexty', fillcolor=color, name=name, legendgroup=name,
+                       hovertemplate=f"{name}<br>Week=%{{x}}<br>Lower=%{{y}}<extra></extra>"),
+        ]
+
+    traces = band(low, high, 'Min - Max', 'rgba(74, 111, 165, 0.15)')
+    traces += band(p10, p90, 'P10 - P90', 'rgba(74, 111, 165, 0.35)')
+    traces.append(go.Scatter(x=week_order, y=median, mode='lines', name='Median',
+                             line=dict(color='#1e3a8a', width=2)))
+
+    volatility = np.where(np.isnan(volatility), -np.inf, volatility)
+    top_k = min(top_k, len(materials))
+    if top_k:
+        top_rows = np.argpartition(-volatility, top_k - 1)[:top_k]
+        top_rows = top_rows[np.argsort(-volatility[top_rows], kind='stable')]
+        for row in top_rows:
+            traces.append(go.Scattergl(
+                x=week_order, y=values[row], mode='lines+markers',
+                name=str(materials[row]), marker=dict(size=5),
+            ))
+    return traces
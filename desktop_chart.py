@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from PySide6.QtCore import QUrl
+from PySide6.QtWebEngineWidgets import QWebEngineView
+
+# Chart widget for the desktop app. The page and the plotly.js bundle shipped
+# with the plotly package are loaded once, offline; afterwards only figure JSON
+# is pushed into the page and applied with Plotly.react, so redraws neither
+# reload the page nor touch the network.
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="{plotly_js}"></script>
+<style>
+  html, body {{ margin: 0; height: 100%; background: white; }}
+  #chart {{ width: 100%; height: 100%; }}
+</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+  function renderFigure(figure) {{
+    var layout = figure.layout || {{}};
+    layout.autosize = true;
+    delete layout.width;
+    Plotly.react('chart', figure.data || [], layout, {{responsive: true, displaylogo: false}});
+  }}
+  function clearFigure() {{
+    Plotly.purge('chart');
+  }}
+</script>
+</body>
+</html>
+"""
+
+
+def plotly_js_path():
+    # The minified bundle shipped inside the plotly package; written out once
+    # from plotly.offline if the package data is not available as a file
+    import plotly
+    bundled = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+    if os.path.exists(bundled):
+        return bundled
+
+    from plotly.offline import get_plotlyjs
+    path = os.path.join(tempfile.gettempdir(), f"fluxanalyzer-plotly-{plotly.__version__}.min.js")
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return path
+
+
+class PlotlyView(QWebEngineView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ready = False
+        self._pending = None
+        self.loadFinished.connect(self._on_load_finished)
+
+        js_path = plotly_js_path()
+        page = PAGE_TEMPLATE.format(plotly_js=os.path.basename(js_path))
+        # Base URL points at the bundle's folder so the page can load it from disk
+        self.setHtml(page, QUrl.fromLocalFile(os.path.dirname(js_path) + os.sep))
+
+    def show_figure(self, figure_json):
+        # ``figure_json`` is the output of fig.to_json(); it is a JS object literal as is
+        if not self._ready:
+            self._pending = figure_json
+            return
+        self.page().runJavaScript(f"renderFigure({figure_json});")
+
+    def clear(self):
+        self._pending = None
+        if self._ready:
+            self.page().runJavaScript("clearFigure();")
+
+    def _on_load_finished(self, ok):
+        self._ready = ok
+        if ok and self._pending is not None:
+            figure_json, self._pending = self._pending, None
+            self.show_figure(figure_json)
@@ -0,0 +1,94 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableView, QVBoxLayout
+)
+
+from charts import part_trend_figure
+from desktop_table import ColumnarTableModel
+
+# Snapshot history window: parts that became critical since the previous
+# snapshot of the sheet, and the trend of one part across all snapshots.
+# Double-clicking a newly critical part shows its trend.
+
+PERCENT = '{:.1%}'.format
+
+
+def _percent(value):
+    return "" if value is None or value != value else PERCENT(value)
+
+
+class HistoryDialog(QDialog):
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.sheet = None
+        self.series = None
+        self.setWindowTitle("Snapshot History")
+        self.resize(900, 750)
+
+        layout = QVBoxLayout(self)
+        self.newly_label = QLabel("No snapshot saved yet.")
+        layout.addWidget(self.newly_label)
+        self.newly_table = QTableView()
+        self.newly_table.setSortingEnabled(True)
+        self.newly_table.doubleClicked.connect(self.show_trend_of_row)
+        layout.addWidget(self.newly_table)
+
+        trend_bar = QHBoxLayout()
+        trend_bar.addWidget(QLabel("Part number:"))
+        self.part_input = QLineEdit()
+        self.part_input.returnPressed.connect(self.show_trend)
+        trend_bar.addWidget(self.part_input)
+        trend_btn = QPushButton("Show trend")
+        trend_btn.clicked.connect(self.show_trend)
+        trend_bar.addWidget(trend_btn)
+        layout.addLayout(trend_bar)
+
+        # The trend chart uses the web engine when it is available, the table always
+        try:
+            from desktop_chart import PlotlyView
+            self.trend_view = PlotlyView()
+            self.trend_view.setMinimumHeight(320)
+            layout.addWidget(self.trend_view)
+        except ImportError:
+            self.trend_view = None
+        self.trend_table = QTableView()
+        layout.addWidget(self.trend_table)
+
+    def show_snapshot(self, snapshot_id, sheet, series=None):
+        self.sheet = sheet
+        self.series = series
+        previous_id = self.store.previous_snapshot(snapshot_id)
+        if previous_id is None:
+            self.newly_label.setText(f"First snapshot of '{sheet}'; nothing to compare with yet.")
+            self.newly_table.setModel(None)
+            return
+        snapshots = self.store.snapshots(sheet, series).set_index('id')['snapshot_date']
+        newly = self.store.newly_critical(snapshot_id, previous_id)
+        self.newly_label.setText(
+            f"{len(newly):,} parts newly critical in '{sheet}' on {snapshots.get(snapshot_id)} "
+            f"(previous snapshot {snapshots.get(previous_id)})"
+        )
+        model = ColumnarTableModel.from_frame(
+            newly, formatters={'Fluctuation': _percent, 'Previous fluctuation': _percent}
+        )
+        self.newly_table.setModel(model)
+        self.newly_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+
+    def show_trend_of_row(self, index):
+        model = self.newly_table.model()
+        material_column = [model.headerData(c, Qt.Horizontal) for c in range(model.columnCount())].index('Material')
+        self.part_input.setText(index.siblingAtColumn(material_column).data())
+        self.show_trend()
+
+    def show_trend(self):
+        material = self.part_input.text().strip()
+        if not material:
+            return
+        trend = self.store.part_trend(material, sheet=self.sheet, series=self.series)
+        self.trend_table.setModel(ColumnarTableModel.from_frame(trend, formatters={'Fluctuation': _percent}))
+        if self.trend_view is not None:
+            if trend.empty:
+                self.trend_view.clear()
+            else:
+                self.trend_view.show_figure(part_trend_figure(trend, material).to_json())
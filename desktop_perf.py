@@ -0,0 +1,55 @@
+from PySide6.QtWidgets import QFrame, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout, QHeaderView
+
+# Debug panel listing the stage timings of the latest sheet load and the
+# latest project update. Toggled from the header button or with F12.
+
+COLUMNS = ['Pipeline', 'Stage', 'Time (ms)', 'Rows', 'Memory Δ (MB)']
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return f"{value:,}"
+    return str(value)
+
+
+class PerformancePanel(QFrame):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("""
+            QFrame {
+                padding: 10px;
+            }
+        """)
+        self._pipelines = {}
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel("No timings recorded yet.")
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setMinimumHeight(160)
+        layout.addWidget(self.table)
+
+    def show_timer(self, pipeline, timer):
+        # Replaces the rows of one pipeline ("sheet" or "project") with the timer's spans
+        self._pipelines[pipeline] = (timer.total_seconds, timer.rows())
+        rows = [
+            (name, row)
+            for name, (_, timer_rows) in self._pipelines.items()
+            for row in timer_rows
+        ]
+        self.table.setRowCount(len(rows))
+        for r, (name, row) in enumerate(rows):
+            values = [name, row['Stage'], row['Time (ms)'], row['Rows'], row['Memory Δ (MB)']]
+            for c, value in enumerate(values):
+                self.table.setItem(r, c, QTableWidgetItem(_cell_text(value)))
+
+        self.summary_label.setText("   ".join(
+            f"{name}: {total * 1000:,.0f} ms" for name, (total, _) in self._pipelines.items()
+        ))
@@ -0,0 +1,100 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableView, QVBoxLayout
+)
+
+from charts import sweep_figure
+from desktop_table import ColumnarTableModel
+from desktop_workers import JobChannel
+from fluctuation import FROZEN_WEEKS
+from ui_inputs import parse_values
+
+# What-if window: critical part counts of the loaded sheet for several
+# thresholds and frozen-zone lengths at once. The sweep runs on the worker
+# pool from the sheet's week matrix, so nothing is re-read or re-sorted.
+
+DEFAULT_THRESHOLDS = "10%, 15%, 20%, 25%, 30%"
+DEFAULT_FROZEN = f"2, {FROZEN_WEEKS}, 6"
+
+
+def _percent(value):
+    return "" if value is None or value != value else f"{value:.1%}"
+
+
+def run_sweep(sheet_index, thresholds, frozen_lengths, token, report):
+    token.check()
+    return sheet_index.threshold_sweep(thresholds, frozen_lengths)
+
+
+class SweepDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sheet_index = None
+        self.setWindowTitle("What-if: Threshold and Frozen-Zone Sensitivity")
+        self.resize(900, 750)
+
+        layout = QVBoxLayout(self)
+        inputs = QHBoxLayout()
+        inputs.addWidget(QLabel("Thresholds:"))
+        self.thresholds_input = QLineEdit(DEFAULT_THRESHOLDS)
+        self.thresholds_input.returnPressed.connect(self.run)
+        inputs.addWidget(self.thresholds_input)
+        inputs.addWidget(QLabel("Frozen weeks:"))
+        self.frozen_input = QLineEdit(DEFAULT_FROZEN)
+        self.frozen_input.returnPressed.connect(self.run)
+        inputs.addWidget(self.frozen_input)
+        self.run_btn = QPushButton("Run")
+        self.run_btn.clicked.connect(self.run)
+        inputs.addWidget(self.run_btn)
+        layout.addLayout(inputs)
+
+        self.status_label = QLabel("Load a sheet to run the sweep.")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        # Same fallback as the history window: the table works without the web engine
+        try:
+            from desktop_chart import PlotlyView
+            self.chart_view = PlotlyView()
+            self.chart_view.setMinimumHeight(320)
+            layout.addWidget(self.chart_view)
+        except ImportError:
+            self.chart_view = None
+        self.table = QTableView()
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        self.sweep_jobs = JobChannel(parent=self)
+        self.sweep_jobs.finished.connect(self.on_sweep_done)
+        self.sweep_jobs.failed.connect(self.on_sweep_failed)
+
+    def set_sheet_index(self, sheet_index, sheet=None):
+        self.sheet_index = sheet_index
+        self.sheet = sheet
+        self.run()
+
+    def run(self):
+        if self.sheet_index is None:
+            return
+        thresholds = parse_values(self.thresholds_input.text())
+        n_weeks = len(self.sheet_index.wk_cols)
+        frozen = [w for w in parse_values(self.frozen_input.text(), cast=int) if 0 < w <= n_weeks]
+        if not thresholds or not frozen:
+            self.status_label.setText(f"Enter thresholds and frozen-zone lengths between 1 and {n_weeks}.")
+            return
+        self.status_label.setText("Running…")
+        self.sweep_jobs.submit(run_sweep, self.sheet_index, thresholds, frozen)
+
+    def on_sweep_done(self, sweep):
+        where = f" of '{self.sheet}'" if self.sheet else ""
+        self.status_label.setText(f"{len(sweep)} combinations{where}")
+        model = ColumnarTableModel.from_frame(
+            sweep, formatters={'Threshold': '{:.0%}'.format, 'Worst fluctuation': _percent}
+        )
+        self.table.setModel(model)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        if self.chart_view is not None:
+            self.chart_view.show_figure(sweep_figure(sweep).to_json())
+
+    def on_sweep_failed(self, message):
+        self.status_label.setText(f"The sweep failed: {message}")
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Columnar model for large tables in the desktop app. Raw values are kept per
+# column as NumPy arrays; display strings are formatted lazily in blocks and
+# cached, rows are exposed incrementally through fetchMore, and sorting and
+# filtering permute an index array instead of going through a proxy model.
+
+FETCH_BATCH = 1000
+FORMAT_BLOCK = 512
+
+
+def _default_format(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return str(value)
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    def __init__(self, columns=None, formatters=None, row_labels=None, parent=None):
+        super().__init__(parent)
+        columns = columns or {}
+        formatters = formatters or {}
+        self._names = list(columns)
+        self._values = [np.asarray(columns[name]) for name in self._names]
+        self._formatters = [formatters.get(name, _default_format) for name in self._names]
+        n_rows = len(self._values[0]) if self._values else 0
+        self._row_labels = np.asarray(row_labels) if row_labels is not None else np.arange(n_rows)
+
+        # Display strings per column (plus one slot for row labels), filled on demand
+        self._display = [np.empty(n_rows, dtype=object) for _ in range(len(self._names) + 1)]
+        self._formatted = [np.zeros((n_rows + FORMAT_BLOCK - 1) // FORMAT_BLOCK, dtype=bool)
+                           for _ in range(len(self._names) + 1)]
+
+        self._search = {}
+
+        self._order = np.arange(n_rows)
+        self._mask = None
+        self._view = self._order
+        self._loaded = min(FETCH_BATCH, n_rows)
+
+    @classmethod
+    def from_frame(cls, df, formatters=None, parent=None):
+        columns = {str(name): df[name].to_numpy() for name in df.columns}
+        return cls(columns, formatters, row_labels=df.index.to_numpy(), parent=parent)
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role == Qt.DisplayRole:
+            return self._display_value(index.column(), self._view[index.row()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self._names[section]
+            return self._display_value(len(self._names), self._view[section])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._view)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self._view) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not 0 <= column < len(self._names):
+            return
+        self.layoutAboutToBeChanged.emit()
+        # Stable sort on raw values (numbers sort numerically), NaN/None last
+        self._order = (
+            pd.Series(self._values[column])
+            .sort_values(ascending=order == Qt.AscendingOrder, kind='stable', na_position='last')
+            .index.to_numpy()
+        )
+        self._apply_view()
+        self.layoutChanged.emit()
+
+    # Filtering
+
+    def set_filter(self, text, column=None):
+        # Case-insensitive substring filter over the displayed text of one or all columns
+        self.beginResetModel()
+        text = (text or "").strip().lower()
+        if not text:
+            self._mask = None
+        else:
+            targets = range(len(self._names)) if column is None else [column]
+            mask = np.zeros(len(self._order), dtype=bool)
+            for col in targets:
+                mask |= self._search_strings(col).str.contains(text, regex=False).to_numpy()
+            self._mask = mask
+        self._apply_view()
+        self._loaded = min(FETCH_BATCH, len(self._view))
+        self.endResetModel()
+
+    @property
+    def total_rows(self):
+        return len(self._view)
+
+    def visible_columns(self):
+        # ({name: raw values}, row positions in the current sort and filter order), for export
+        return dict(zip(self._names, self._values)), self._view.copy()
+
+    def _apply_view(self):
+        self._view = self._order if self._mask is None else self._order[self._mask[self._order]]
+        self._loaded = min(max(self._loaded, FETCH_BATCH), len(self._view))
+
+    def _search_strings(self, column):
+        # Lower-cased display strings of a whole column, formatted once and kept
+        strings = self._search.get(column)
+        if strings is None:
+            for block in np.flatnonzero(~self._formatted[column]):
+                self._display_value(column, block * FORMAT_BLOCK)
+            strings = pd.Series(self._display[column], dtype=object).str.lower()
+            self._search[column] = strings
+        return strings
+
+    def _display_value(self, column, row):
+        block = row // FORMAT_BLOCK
+        if not self._formatted[column][block]:
+            start = block * FORMAT_BLOCK
+            stop = start + FORMAT_BLOCK
+            if column == len(self._names):
+                raw, fmt = self._row_labels[start:stop], _default_format
+            else:
+                raw, fmt = self._values[column][start:stop], self._formatters[column]
+            self._display[column][start:start + len(raw)] = [fmt(value) for value in raw]
+            self._formatted[column][block] = True
+        return self._display[column][row]
@@ -0,0 +1,134 @@
+import itertools
+import threading
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# Background execution for the desktop app. Heavy work (sheet parsing, analysis,
+# figure building) runs on a QThreadPool; each JobChannel keeps only its latest
+# submission alive, so a fast series of combo changes drops the stale jobs and
+# only the newest result reaches the GUI thread through signals.
+
+_job_ids = itertools.count(1)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        # Called by job code between stages; aborts the job once it is stale
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class _JobSignals(QObject):
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+    progress = Signal(int, int, int)
+    done = Signal(int)
+
+
+class Job(QRunnable):
+    # Runs ``fn(*args, token=..., report=..., **kwargs)`` on a pool thread
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        # Lifetime is managed by JobChannel, not by the pool
+        self.setAutoDelete(False)
+        self.job_id = next(_job_ids)
+        self.token = CancelToken()
+        self.signals = _JobSignals()
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def report(self, done, total):
+        self.token.check()
+        self.signals.progress.emit(self.job_id, done, total or 0)
+
+    def run(self):
+        try:
+            if self.token.cancelled:
+                return
+            result = self._fn(*self._args, token=self.token, report=self.report, **self._kwargs)
+            if not self.token.cancelled:
+                self.signals.finished.emit(self.job_id, result)
+        except JobCancelled:
+            pass
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, f"{e}\n\n{traceback.format_exc()}")
+        finally:
+            self.signals.done.emit(self.job_id)
+
+
+class JobChannel(QObject):
+    # A lane of jobs where submitting a new one cancels the previous one
+    finished = Signal(object)
+    failed = Signal(str)
+    progress = Signal(int, int)
+
+    def __init__(self, pool=None, parent=None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._current = None
+        self._jobs = {}
+
+    @property
+    def busy(self):
+        return self._current is not None
+
+    def submit(self, fn, *args, **kwargs):
+        self.cancel()
+        job = Job(fn, *args, **kwargs)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.progress.connect(self._on_progress)
+        job.signals.done.connect(self._on_done)
+        self._jobs[job.job_id] = job
+        self._current = job.job_id
+        self._pool.start(job)
+        return job.job_id
+
+    def cancel(self):
+        if self._current is None:
+            return
+        job = self._jobs.get(self._current)
+        if job is not None:
+            job.token.cancel()
+            # Jobs that have not started yet are taken off the queue entirely
+            if self._pool.tryTake(job):
+                self._jobs.pop(job.job_id, None)
+        self._current = None
+
+    def _is_current(self, job_id):
+        return job_id == self._current
+
+    def _on_finished(self, job_id, result):
+        if self._is_current(job_id):
+            self._current = None
+            self.finished.emit(result)
+
+    def _on_failed(self, job_id, message):
+        if self._is_current(job_id):
+            self._current = None
+            self.failed.emit(message)
+
+    def _on_progress(self, job_id, done, total):
+        if self._is_current(job_id):
+            self.progress.emit(done, total)
+
+    def _on_done(self, job_id):
+        # Every job ends here, including cancelled ones, so references are released
+        self._jobs.pop(job_id, None)
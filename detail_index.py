@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Filtering structure for the "Critical Parts Details" table. Rows are sorted
+# once into display order and each filter column is stored as categorical
+# codes. A filter selection is an OR of per-value bitmaps within a column and
+# an AND across columns, over np.packbits-packed masks; the matching rows come
+# out already in display order, so only the visible page needs formatting.
+
+DETAIL_COLUMNS = ['Production line', 'Material', 'Week', 'Fluctuation']
+FILTER_COLUMNS = ['Production line', 'Material', 'Week']
+EAGER_BITMAP_COLUMNS = ['Production line', 'Week']
+
+
+def _codes(values):
+    # Sorted categorical codes; missing values get the last code so they sort last
+    codes, categories = pd.factorize(values, sort=True)
+    codes = codes.astype(np.int64)
+    codes[codes < 0] = len(categories)
+    return codes, categories
+
+
+class DetailIndex:
+    def __init__(self, critical_data):
+        columns = {col: critical_data[col].to_numpy() for col in DETAIL_COLUMNS}
+        codes = {col: _codes(columns[col]) for col in FILTER_COLUMNS}
+
+        # Display order (project, part, week), stable for duplicate rows
+        order = np.lexsort([codes[col][0] for col in reversed(FILTER_COLUMNS)])
+        self.n_rows = len(order)
+        self.columns = {col: values[order] for col, values in columns.items()}
+        self.codes = {col: codes[col][0][order] for col in FILTER_COLUMNS}
+        self.categories = {col: list(codes[col][1]) for col in FILTER_COLUMNS}
+        self._lookup = {col: {value: i for i, value in enumerate(cats)} for col, cats in self.categories.items()}
+
+        # Row positions of every value, grouped by code, to build bitmaps from
+        self._positions = {}
+        for col in FILTER_COLUMNS:
+            by_code = np.argsort(self.codes[col], kind='stable')
+            bounds = np.searchsorted(self.codes[col][by_code], np.arange(len(self.categories[col]) + 1))
+            self._positions[col] = (by_code, bounds)
+        self._bitmaps = {}
+        self._all = np.packbits(np.ones(self.n_rows, dtype=bool))
+
+        # Project and week bitmaps are built up front; part bitmaps on first
+        # use, since a sheet can have thousands of critical parts
+        for col in EAGER_BITMAP_COLUMNS:
+            for value in self.categories[col]:
+                self.bitmap(col, value)
+
+    def __len__(self):
+        return self.n_rows
+
+    def bitmap(self, column, value):
+        # Packed row mask of one value, built on first use and kept
+        key = (column, value)
+        bits = self._bitmaps.get(key)
+        if bits is None:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            code = self._lookup[column].get(value)
+            if code is not None:
+                by_code, bounds = self._positions[column]
+                mask[by_code[bounds[code]:bounds[code + 1]]] = True
+            bits = np.packbits(mask)
+            self._bitmaps[key] = bits
+        return bits
+
+    def select(self, selections):
+        # Row positions (in display order) matching every non-empty selection,
+        # given as {column: [values]}
+        bits = self._all
+        for column, values in selections.items():
+            if not values:
+                continue
+            column_bits = np.bitwise_or.reduce([self.bitmap(column, value) for value in values])
+            bits = bits & column_bits
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def page(self, positions, page=0, page_size=100, formatters=None):
+        # DataFrame of one page of ``positions``; only these rows are formatted
+        rows = positions[page * page_size:(page + 1) * page_size]
+        frame = pd.DataFrame({col: values[rows] for col, values in self.columns.items()})
+        for col, fmt in (formatters or {}).items():
+            frame[col] = [fmt(value) for value in frame[col]]
+        return frame
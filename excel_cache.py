@@ -0,0 +1,183 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import excel_reader
+
+# Parsed frames are kept until this many bytes are held in memory
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Sheet name lists of this many workbooks are kept, least recently used first out
+SHEET_NAMES_ENTRIES = 256
+# Version of the parsed frames; part of the sidecar file names, so bump it
+# whenever the parser's output changes and older sidecars are not served
+FORMAT_VERSION = 4
+
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SheetCache:
+    """Content-addressed cache of parsed sheets.
+
+    Entries are keyed by (sha256 of the workbook bytes, sheet name), evicted
+    least-recently-used once ``max_bytes`` is exceeded, and optionally mirrored
+    to Parquet files in ``sidecar_dir`` so a re-upload skips Excel parsing.
+    Cached frames are shared between callers and must not be modified in place.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, sidecar_dir=None):
+        self.max_bytes = max_bytes
+        self.sidecar_dir = sidecar_dir if sidecar_dir and _parquet_available() else None
+        if self.sidecar_dir:
+            os.makedirs(self.sidecar_dir, exist_ok=True)
+        self._frames = OrderedDict()
+        self._sizes = {}
+        self._sheet_names = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __contains__(self, key):
+        return key in self._frames
+
+    def get(self, digest, sheet_name):
+        key = (digest, sheet_name)
+        with self._lock:
+            df = self._frames.get(key)
+            if df is not None:
+                self._frames.move_to_end(key)
+                return df
+        df = self._read_sidecar(digest, sheet_name)
+        if df is not None:
+            self.put(digest, sheet_name, df, write_sidecar=False)
+        return df
+
+    def put(self, digest, sheet_name, df, write_sidecar=True):
+        key = (digest, sheet_name)
+        size = frame_nbytes(df)
+        with self._lock:
+            if key in self._frames:
+                self._total -= self._sizes.pop(key)
+                del self._frames[key]
+            self._frames[key] = df
+            self._sizes[key] = size
+            self._total += size
+            self._evict()
+        if write_sidecar:
+            self._write_sidecar(digest, sheet_name, df)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+            self._sheet_names.clear()
+            self._total = 0
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the cap
+        while self._total > self.max_bytes and len(self._frames) > 1:
+            key, _ = self._frames.popitem(last=False)
+            self._total -= self._sizes.pop(key)
+
+    def sheet_names(self, data, digest=None):
+        digest = digest or file_digest(data)
+        with self._lock:
+            names = self._sheet_names.get(digest)
+            if names is not None:
+                self._sheet_names.move_to_end(digest)
+                return names
+        names = self._read_names_sidecar(digest)
+        if names is None:
+            names = excel_reader.sheet_names(_as_buffer(data))
+            self._write_names_sidecar(digest, names)
+        with self._lock:
+            self._sheet_names[digest] = names
+            while len(self._sheet_names) > SHEET_NAMES_ENTRIES:
+                self._sheet_names.popitem(last=False)
+        return names
+
+    def load(self, data, sheet_name, digest=None, parse=None):
+        # Return the parsed sheet, parsing it with ``parse(buffer, sheet_name)`` on a miss
+        digest = digest or file_digest(data)
+        df = self.get(digest, sheet_name)
+        if df is None:
+            if parse is None:
+                df = excel_reader.read_sheet(_as_buffer(data), sheet_name, digest=digest)
+            else:
+                df = parse(_as_buffer(data), sheet_name)
+            self.put(digest, sheet_name, df)
+        return df
+
+    # Parquet / JSON sidecars
+
+    def _sidecar_path(self, digest, sheet_name, ext):
+        sheet_key = hashlib.sha1(str(sheet_name).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.sidecar_dir, f"{digest}-{sheet_key}-v{FORMAT_VERSION}.{ext}")
+
+    def _read_sidecar(self, digest, sheet_name):
+        if not self.sidecar_dir:
+            return None
+        path = self._sidecar_path(digest, sheet_name, "parquet")
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            return None
+
+    def _write_sidecar(self, digest, sheet_name, df):
+        if not self.sidecar_dir:
+            return
+        path = self._sidecar_path(digest, sheet_name, "parquet")
+        tmp_path = path + ".tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            # Mixed-type object columns cannot always be stored as Arrow; keep memory-only
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_names_sidecar(self, digest):
+        if not self.sidecar_dir:
+            return None
+        path = os.path.join(self.sidecar_dir, f"{digest}.sheets.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_names_sidecar(self, digest, names):
+        if not self.sidecar_dir:
+            return
+        path = os.path.join(self.sidecar_dir, f"{digest}.sheets.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(names, f)
+
+
+def _as_buffer(data):
+    return io.BytesIO(data)
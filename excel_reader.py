@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from fluctuation import ID_COLUMNS, compact_frame
+from normalize import cached_schema, normalize_frame
+
+# Streaming, column-projected sheet reader built on openpyxl's read-only mode.
+# Only the identifier columns and the wk* columns are kept; rows are pulled in
+# chunks and written into preallocated typed arrays, so peak memory stays close
+# to the size of the resulting frame. The result is compacted with
+# fluctuation.compact_frame (categorical identifiers, float32 weeks) after
+# text in the value columns ("12%", "0,12") is normalized (see normalize.py).
+
+CHUNK_SIZE = 5000
+HEADER_SCAN_ROWS = 20
+TEXT_COLUMNS = ('Material', 'Production line')
+NUMERIC_TYPES = (int, float, bool, type(None))
+
+
+def sheet_names(source):
+    wb = load_workbook(source, read_only=True, keep_links=False)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def is_projected(name):
+    return name in ID_COLUMNS or str(name).lower().startswith('wk')
+
+
+def find_header(ws):
+    # (row number, values) of the first row carrying an identifier column,
+    # else of the first non-empty row
+    fallback = None
+    for row_number, row in enumerate(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True), start=1):
+        if any(value in ID_COLUMNS for value in row):
+            return row_number, row
+        if fallback is None and any(value is not None for value in row):
+            fallback = (row_number, row)
+    return fallback
+
+
+class _Column:
+    # Float64 until a non-numeric value shows up, then object (as read_excel would give)
+
+    def __init__(self, name, capacity):
+        self.name = name
+        if name in TEXT_COLUMNS:
+            self.values = np.empty(capacity, dtype=object)
+        else:
+            self.values = np.full(capacity, np.nan)
+
+    def grow(self, capacity):
+        extra = capacity - len(self.values)
+        if self.values.dtype == object:
+            fill = np.empty(extra, dtype=object)
+        else:
+            fill = np.full(extra, np.nan)
+        self.values = np.concatenate([self.values, fill])
+
+    def write(self, start, values):
+        stop = start + len(values)
+        if self.values.dtype != object:
+            if set(map(type, values)).issubset(NUMERIC_TYPES):
+                self.values[start:stop] = np.array(values, dtype=float)
+                return
+            self.values = self.values.astype(object)
+        self.values[start:stop] = values
+
+
+def read_sheet(source, sheet_name, chunk_size=CHUNK_SIZE, progress=None, on_chunk=None, digest=None):
+    # ``source`` may be a path or a binary file object (.xlsx or .xlsm).
+    # ``progress(rows_read, total_rows)`` is called after every chunk; total_rows
+    # comes from the sheet's declared dimension and may be None. ``on_chunk(df)``
+    # gets the raw (not yet compacted) rows of every chunk as they are read.
+    # ``digest`` identifies the workbook content, so the inferred value column
+    # formats are reused when the same file is read again. Cells that could not
+    # be parsed are reported in ``df.attrs['unparsed_cells']``.
+    wb = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[sheet_name]
+        header = find_header(ws)
+        if header is None:
+            return pd.DataFrame()
+        header_row, header_values = header
+
+        positions = {}
+        for pos, name in enumerate(header_values):
+            if name is not None and is_projected(name) and name not in positions:
+                positions[name] = pos
+        if not positions:
+            return pd.DataFrame()
+
+        # Only the span between the first and last projected column is decoded
+        min_col = min(positions.values())
+        max_col = max(positions.values())
+        offsets = [pos - min_col for pos in positions.values()]
+
+        total_rows = ws.max_row - header_row if ws.max_row else None
+        columns = [_Column(name, total_rows or chunk_size) for name in positions]
+
+        rows = ws.iter_rows(
+            min_row=header_row + 1, min_col=min_col + 1, max_col=max_col + 1, values_only=True
+        )
+        n_rows = 0
+        last_filled = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                last_filled = _flush(chunk, columns, offsets, n_rows, last_filled)
+                if on_chunk:
+                    on_chunk(_chunk_frame(columns, n_rows, n_rows + len(chunk)))
+                n_rows += len(chunk)
+                chunk = []
+                if progress:
+                    progress(n_rows, total_rows)
+        if chunk:
+            last_filled = _flush(chunk, columns, offsets, n_rows, last_filled)
+            if on_chunk:
+                on_chunk(_chunk_frame(columns, n_rows, n_rows + len(chunk)))
+            n_rows += len(chunk)
+        if progress:
+            progress(n_rows, n_rows)
+    finally:
+        wb.close()
+
+    # Trailing blank rows are dropped, like read_excel does
+    df = pd.DataFrame({col.name: col.values[:last_filled] for col in columns})
+    df, unparsed = normalize_frame(df, cached_schema(digest, sheet_name, df), first_row=header_row + 1)
+    df = compact_frame(df)
+    df.attrs['unparsed_cells'] = unparsed
+    return df
+
+
+def _chunk_frame(columns, start, stop):
+    return pd.DataFrame({col.name: col.values[start:stop] for col in columns})
+
+
+def _flush(chunk, columns, offsets, start, last_filled):
+    # Write one chunk of rows into the column arrays; returns the new end of data
+    needed = start + len(chunk)
+    filled = np.zeros(len(chunk), dtype=bool)
+    for col, offset in zip(columns, offsets):
+        if needed > len(col.values):
+            col.grow(max(needed, 2 * len(col.values)))
+        values = [row[offset] if offset < len(row) else None for row in chunk]
+        col.write(start, values)
+        filled |= np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+
+    if filled.any():
+        return start + int(np.flatnonzero(filled)[-1]) + 1
+    return last_filled
@@ -0,0 +1,205 @@
+import os
+
+import pandas as pd
+
+# Streaming export of critical-part rows and their per-project summary. Rows
+# are cut from column arrays CHUNK_ROWS at a time and appended to an openpyxl
+# write-only workbook, a CSV file or a pyarrow ParquetWriter, so memory stays
+# bounded by one chunk whatever the size of the export. The summary is
+# accumulated from the same chunks. Files are written under a temporary name
+# and renamed when complete, so a cancelled export leaves nothing behind.
+
+CHUNK_ROWS = 20000
+EXPORT_FORMATS = {'xlsx': 'Excel workbook', 'csv': 'CSV', 'parquet': 'Parquet'}
+SUMMARY_COLUMNS = ['Production line', 'critical_parts', 'highest_fluctuation', 'affected_weeks']
+PERCENT_COLUMNS = ('Fluctuation', 'highest_fluctuation')
+EXCEL_MAX_ROWS = 1048575  # data rows per sheet, below the header
+COMPACT_EVERY = 16
+
+
+def export_chunks(columns, rows=None, chunk_rows=CHUNK_ROWS):
+    # DataFrames of ``rows`` (positions, in export order; default all) of
+    # ``columns`` ({name: array}), ``chunk_rows`` at a time
+    n_rows = len(rows) if rows is not None else len(next(iter(columns.values()), []))
+    for start in range(0, n_rows, chunk_rows):
+        take = rows[start:start + chunk_rows] if rows is not None else slice(start, start + chunk_rows)
+        yield pd.DataFrame({name: values[take] for name, values in columns.items()})
+
+
+class SummaryAccumulator:
+    # Per-project summary (as fluctuation.project_summary) and overall metrics
+    # of the exported rows, built chunk by chunk. Only distinct (project, part)
+    # and (project, week) pairs are kept.
+
+    def __init__(self):
+        self.rows = 0
+        self._peaks = []
+        self._parts = []
+        self._weeks = []
+
+    def add(self, chunk):
+        self.rows += len(chunk)
+        self._peaks.append(chunk.groupby('Production line', dropna=False, sort=False)['Fluctuation'].max())
+        self._parts.append(chunk[['Production line', 'Material']].drop_duplicates())
+        self._weeks.append(chunk[['Production line', 'Week']].drop_duplicates())
+        if len(self._peaks) >= COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self):
+        if not self._peaks:
+            return
+        peaks = pd.concat(self._peaks)
+        self._peaks = [peaks.groupby(level=0, dropna=False, sort=False).max()]
+        self._parts = [pd.concat(self._parts).drop_duplicates()]
+        self._weeks = [pd.concat(self._weeks).drop_duplicates()]
+
+    def summary(self):
+        # (per-project DataFrame, metrics dict)
+        self._compact()
+        if not self.rows:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS), {
+                'rows': 0, 'critical_parts': 0, 'projects_affected': 0,
+                'highest_fluctuation': None, 'affected_weeks': 0,
+            }
+        peaks, parts, weeks = self._peaks[0], self._parts[0], self._weeks[0]
+        summary = pd.DataFrame({
+            'critical_parts': parts.groupby('Production line', dropna=False)['Material'].nunique(),
+            'highest_fluctuation': peaks,
+            'affected_weeks': weeks.groupby('Production line', dropna=False)['Week'].nunique(),
+        }).rename_axis('Production line').reset_index()
+        summary = summary.sort_values('Production line', na_position='last', ignore_index=True)
+        metrics = {
+            'rows': self.rows,
+            'critical_parts': int(parts['Material'].nunique()),
+            'projects_affected': len(summary),
+            'highest_fluctuation': float(peaks.max()),
+            'affected_weeks': int(weeks['Week'].nunique()),
+        }
+        return summary[SUMMARY_COLUMNS], metrics
+
+
+def summary_path(path):
+    # "<stem>.summary.<ext>" next to the exported rows, as batch.py names its outputs
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.summary{ext}"
+
+
+def export_critical(path, columns, rows=None, fmt=None, progress=None, chunk_rows=CHUNK_ROWS):
+    # Writes the selected critical rows and their summary; ``fmt`` defaults to
+    # the file extension. Excel gets "Critical parts" and "Summary" sheets,
+    # CSV and Parquet a second file (see summary_path). ``progress(done, total)``
+    # is called after every chunk. Returns the written paths.
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt!r}")
+    total = len(rows) if rows is not None else len(next(iter(columns.values()), []))
+    accumulator = SummaryAccumulator()
+
+    def chunks():
+        for chunk in export_chunks(columns, rows, chunk_rows):
+            accumulator.add(chunk)
+            yield chunk
+            if progress is not None:
+                progress(accumulator.rows, total)
+
+    if fmt == 'xlsx':
+        _write_excel(path, list(columns), chunks(), accumulator)
+        return [path]
+    write = _write_csv if fmt == 'csv' else _write_parquet
+    write(path, chunks())
+    summary, _ = accumulator.summary()
+    write(summary_path(path), iter([summary]))
+    return [path, summary_path(path)]
+
+
+def _replace_when_done(path, write):
+    tmp_path = path + '.tmp'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_csv(path, chunks):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            header = True
+            for chunk in chunks:
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+    _replace_when_done(path, write)
+
+
+def _write_parquet(path, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def write(tmp_path):
+        writer = None
+        try:
+            for chunk in chunks:
+                # Text columns are written as strings whatever the identifiers look like
+                text = {col: 'string' for col in chunk.columns if chunk[col].dtype == object}
+                table = pa.Table.from_pandas(chunk.astype(text), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    _replace_when_done(path, write)
+
+
+def _excel_rows(chunk, percent_formats):
+    # Plain Python values per row; NaN becomes an empty cell, percent columns get a format
+    values = [chunk[col].astype(object).where(chunk[col].notna(), None).tolist() for col in chunk.columns]
+    for row in zip(*values):
+        yield [fmt(value) if fmt is not None else value for fmt, value in zip(percent_formats, row)]
+
+
+def _write_excel(path, names, chunks, accumulator):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    def write(tmp_path):
+        wb = Workbook(write_only=True)
+
+        def percent_cell(ws):
+            def cell(value):
+                cell = WriteOnlyCell(ws, value=value)
+                cell.number_format = '0.0%'
+                return cell
+            return cell
+
+        def new_sheet(title, columns):
+            ws = wb.create_sheet(title)
+            ws.append(list(columns))
+            formats = [percent_cell(ws) if col in PERCENT_COLUMNS else None for col in columns]
+            return ws, formats
+
+        # Rows beyond Excel's sheet limit continue on another sheet
+        sheet_number, written = 1, 0
+        ws, formats = new_sheet("Critical parts", names)
+        for chunk in chunks:
+            for row in _excel_rows(chunk, formats):
+                if written == EXCEL_MAX_ROWS:
+                    sheet_number += 1
+                    ws, formats = new_sheet(f"Critical parts ({sheet_number})", names)
+                    written = 0
+                ws.append(row)
+                written += 1
+
+        summary, metrics = accumulator.summary()
+        ws, _ = new_sheet("Summary", ["Metric", "Value"])
+        for name, value in metrics.items():
+            ws.append([name, value])
+        ws.append([])
+        ws.append(SUMMARY_COLUMNS)
+        formats = [percent_cell(ws) if col in PERCENT_COLUMNS else None for col in SUMMARY_COLUMNS]
+        for row in _excel_rows(summary, formats):
+            ws.append(row)
+        wb.save(tmp_path)
+
+    _replace_when_done(path, write)
@@ -0,0 +1,546 @@
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from normalize import infer_format, parse_column
+
+# Shared fluctuation analysis used by both app.py and DesktopDataViz.py.
+# Everything works on the wide "wk*" block as a 2-D matrix; long-format rows
+# are only materialized where a frontend actually needs them.
+#
+# Loaded sheets are kept compact (see compact_frame): identifiers are
+# categoricals and week values float32, so thresholds are compared in float32
+# as well, otherwise a cell holding exactly 0.2 would count as above 0.2.
+
+ID_COLUMNS = ['Material', 'Production line', 'Deficit quantity']
+CATEGORICAL_COLUMNS = ['Material', 'Production line']
+WEEK_DTYPE = np.float32
+CRITICAL_THRESHOLD = 0.2
+FROZEN_WEEKS = 4
+
+CriticalParts = namedtuple('CriticalParts', ['data', 'summary', 'metrics'])
+
+
+def week_columns(df):
+    return [col for col in df.columns if str(col).lower().startswith('wk')]
+
+
+def compact_frame(df):
+    # Categorical identifiers and float32 week columns. Week columns holding
+    # text (not yet normalized) are left as they are.
+    columns = {}
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and (
+            pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])
+        ) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = df[col].astype('category')
+    for col in week_columns(df):
+        if pd.api.types.is_float_dtype(df[col]) and df[col].dtype != WEEK_DTYPE:
+            columns[col] = df[col].astype(WEEK_DTYPE)
+    if not columns:
+        return df
+    # Rebuilt from standalone arrays: a column taken as is could still be a
+    # view into the original float64 block and keep all of it alive
+    return pd.DataFrame(
+        {col: columns[col] if col in columns else df[col].to_numpy(copy=True) for col in df.columns},
+        index=df.index,
+    )
+
+
+def week_matrix(df, wk_cols, rows=None):
+    # (rows x weeks) float32 matrix; blanks become NaN. ``rows`` selects and
+    # orders rows; it is applied column by column, so no full-size temporary
+    # copy of the block is made on the way.
+    n_rows = len(df) if rows is None else len(rows)
+    matrix = np.empty((n_rows, len(wk_cols)), dtype=WEEK_DTYPE)
+    for j, col in enumerate(wk_cols):
+        values = df[col].to_numpy(dtype=WEEK_DTYPE, na_value=np.nan)
+        matrix[:, j] = values if rows is None else values[rows]
+    return matrix
+
+
+def column_take(series, rows):
+    # Values of ``series`` at positions ``rows``, without materializing a
+    # categorical column in full first
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Missing values have code -1, which would index the last category
+        # (or fail when there are none), so they are masked after the lookup
+        codes = series.cat.codes.to_numpy()[rows]
+        categories = series.cat.categories.to_numpy(dtype=object)
+        if not len(categories):
+            return np.full(len(codes), np.nan, dtype=object)
+        values = categories[np.where(codes >= 0, codes, 0)]
+        values[codes < 0] = np.nan
+        return values
+    return series.to_numpy()[rows]
+
+
+def long_format(df_selected, wk_cols, matrix=None):
+    # Equivalent of melt + prepending the "Deficit" pseudo-week + sorting by
+    # (Material, Week), built directly from the wide block.
+    week_order = ['Deficit'] + list(wk_cols)
+    n_weeks = len(week_order)
+
+    deficit = df_selected['Deficit quantity'].to_numpy()
+    values = np.column_stack([
+        np.asarray(deficit, dtype=float),
+        week_matrix(df_selected, wk_cols) if matrix is None else matrix,
+    ])
+
+    # Positional order of materials (NaN last), like sort_values did
+    order = (
+        df_selected['Material'].reset_index(drop=True)
+        .sort_values(kind='stable').index.to_numpy()
+    )
+    return pd.DataFrame({
+        'Material': np.repeat(df_selected['Material'].to_numpy()[order], n_weeks),
+        'Production line': np.repeat(df_selected['Production line'].to_numpy()[order], n_weeks),
+        'Deficit quantity': np.repeat(deficit[order], n_weeks),
+        'Week': pd.Categorical.from_codes(
+            np.tile(np.arange(n_weeks), len(order)), categories=week_order, ordered=True
+        ),
+        'Fluctuation': values[order].ravel(),
+    })
+
+
+def empty_metrics():
+    return {
+        'critical_parts': 0,
+        'projects_affected': 0,
+        'highest_fluctuation': 0.0,
+        'affected_weeks': 0,
+    }
+
+
+def critical_cells(frozen, threshold=CRITICAL_THRESHOLD):
+    # (row, week, value) of every frozen-zone cell above ``threshold``, in
+    # week-major order, matching what melt used to produce
+    with np.errstate(invalid='ignore'):
+        mask = frozen > frozen.dtype.type(threshold)
+    week_idx, row_idx = np.nonzero(mask.T)
+    return row_idx, week_idx, frozen[row_idx, week_idx]
+
+
+def build_critical(df, frozen_cols, row_idx, week_idx, values):
+    # Long-format critical rows, per-part maximum and metrics from critical cells of ``df``
+    materials = column_take(df['Material'], row_idx)
+    projects = column_take(df['Production line'], row_idx)
+    data = pd.DataFrame({
+        'Material': materials,
+        'Production line': projects,
+        'Deficit quantity': column_take(df['Deficit quantity'], row_idx),
+        'Week': np.asarray(frozen_cols, dtype=object)[week_idx],
+        'Fluctuation': values,
+    })
+
+    if not len(data):
+        summary = pd.DataFrame(columns=['Material', 'Production line', 'Fluctuation'])
+        return CriticalParts(data, summary, empty_metrics())
+
+    # Only the (few) critical rows are grouped
+    summary = (
+        data.groupby(['Material', 'Production line'], sort=True)['Fluctuation']
+        .max()
+        .reset_index()
+    )
+
+    metrics = {
+        'critical_parts': int(pd.unique(materials).size),
+        'projects_affected': int(pd.unique(projects).size),
+        'highest_fluctuation': float(values.max()),
+        'affected_weeks': int(np.unique(week_idx).size),
+    }
+    return CriticalParts(data, summary, metrics)
+
+
+def critical_parts(df, wk_cols, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS, matrix=None):
+    # Parts whose fluctuation exceeds ``threshold`` in the first ``frozen_weeks`` weeks.
+    # Returns the long-format critical rows, the per-part maximum and the four metric values.
+    # ``matrix`` is the already extracted week matrix of ``df``, if the caller has one.
+    frozen_cols = list(wk_cols[:frozen_weeks])
+    if matrix is None:
+        frozen = week_matrix(df, frozen_cols)
+    else:
+        frozen = matrix[:, :len(frozen_cols)]
+    row_idx, week_idx, values = critical_cells(frozen, threshold)
+    return build_critical(df, frozen_cols, row_idx, week_idx, values)
+
+
+class CriticalTally:
+    """Project list and critical metrics of a sheet while it is still being read.
+
+    Chunks of raw rows (see excel_reader.read_sheet's ``on_chunk``) are added
+    as they arrive; only the projects seen, their row counts and the distinct
+    critical parts, projects and weeks are kept. Once the whole sheet has been
+    added, ``metrics`` equals what SheetIndex.critical reports for it.
+    """
+
+    def __init__(self, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+        self.threshold = WEEK_DTYPE(threshold)
+        self.frozen_weeks = frozen_weeks
+        self.rows = 0
+        self.project_rows = {}
+        self._parts = set()
+        self._projects = set()
+        self._weeks = set()
+        self._highest = None
+
+    def add(self, chunk):
+        self.rows += len(chunk)
+        if 'Production line' not in chunk.columns:
+            return
+        projects = chunk['Production line'].astype(object)
+        projects = projects.where(projects.notna(), None)
+        for project, count in projects.value_counts(dropna=True).items():
+            self.project_rows[project] = self.project_rows.get(project, 0) + int(count)
+
+        frozen_cols = week_columns(chunk)[:self.frozen_weeks]
+        if not frozen_cols:
+            return
+        # Raw chunks may still hold "12%"-style text; it is read as the final frame will be
+        frozen = np.empty((len(chunk), len(frozen_cols)), dtype=WEEK_DTYPE)
+        for j, col in enumerate(frozen_cols):
+            values = chunk[col].to_numpy()
+            frozen[:, j] = parse_column(values, infer_format(values))[0] if values.dtype == object else values
+        row_idx, week_idx, values = critical_cells(frozen, self.threshold)
+        if not len(values):
+            return
+        self._parts.update(chunk['Material'].to_numpy()[row_idx].tolist())
+        self._projects.update(projects.to_numpy()[row_idx].tolist())
+        self._weeks.update(frozen_cols[i] for i in np.unique(week_idx))
+        highest = float(values.max())
+        self._highest = highest if self._highest is None else max(self._highest, highest)
+
+    @property
+    def projects(self):
+        return sorted(self.project_rows)
+
+    @property
+    def metrics(self):
+        if self._highest is None:
+            return empty_metrics()
+        return {
+            'critical_parts': len(self._parts),
+            'projects_affected': len(self._projects),
+            'highest_fluctuation': self._highest,
+            'affected_weeks': len(self._weeks),
+        }
+
+
+class WeekCube:
+    """Project x week aggregates of one sheet, for one critical threshold.
+
+    Built in a single pass over the project-sorted week matrix: for every
+    project (rows without one form a last group) and week the number of
+    filled cells, their max and min, the number of distinct parts with a
+    value, the number of cells above ``threshold`` and the number of distinct
+    parts with a cell above it. ``first_critical`` counts the sheet's distinct
+    parts by the week they first exceed the threshold, so the all-project
+    metrics of any frozen-zone length are sums over (groups x weeks) arrays,
+    however many materials the sheet has.
+    """
+
+    WEEK_BLOCK = 16
+
+    def __init__(self, matrix, groups, materials, weeks, threshold=CRITICAL_THRESHOLD):
+        # ``groups`` is {project: row slice} (None for unassigned rows) over
+        # the rows of ``matrix``; ``materials`` are the rows' material codes
+        self.threshold = threshold
+        self.weeks = list(weeks)
+        self.groups = sorted(groups, key=lambda p: (p is None, groups[p].start))
+        self._positions = {p: i for i, p in enumerate(self.groups)}
+        n_groups, n_weeks = len(self.groups), matrix.shape[1]
+        shape = (n_groups, n_weeks)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.parts = np.zeros(shape, dtype=np.int64)
+        self.critical = np.zeros(shape, dtype=np.int64)
+        self.critical_parts = np.zeros(shape, dtype=np.int64)
+        self.max = np.full(shape, np.nan, dtype=matrix.dtype)
+        self.min = np.full(shape, np.nan, dtype=matrix.dtype)
+        self.first_critical = np.zeros(n_weeks, dtype=np.int64)
+        if not n_groups or not n_weeks:
+            return
+
+        # Group starts in row order; empty groups have no rows to reduce
+        slices = [groups[p] for p in self.groups]
+        nonempty = [i for i, rows in enumerate(slices) if rows.stop > rows.start]
+        by_start = sorted(nonempty, key=lambda i: slices[i].start)
+        starts = np.array([slices[i].start for i in by_start])
+
+        # Rows ordered by (group, material); duplicate lines of a part within a
+        # project are runs in this order, so distinct parts are counted per run
+        group_of_row = np.empty(len(matrix), dtype=np.int64)
+        for i, rows in enumerate(slices):
+            group_of_row[rows] = i
+        by_part = np.lexsort((materials, group_of_row))
+        part_key = group_of_row[by_part] * (int(materials.max(initial=0)) + 1) + materials[by_part]
+        runs = np.flatnonzero(np.r_[True, part_key[1:] != part_key[:-1]])
+        run_starts = np.searchsorted(group_of_row[by_part][runs], nonempty)
+
+        level = matrix.dtype.type(threshold)
+        first_week = np.full(len(matrix), n_weeks)
+        for start in range(0, n_weeks, self.WEEK_BLOCK):
+            block = matrix[:, start:start + self.WEEK_BLOCK]
+            columns = slice(start, start + block.shape[1])
+            filled = ~np.isnan(block)
+            with np.errstate(invalid='ignore'):
+                above = block > level
+            self.count[by_start, columns] = np.add.reduceat(filled, starts, axis=0)
+            self.critical[by_start, columns] = np.add.reduceat(above, starts, axis=0)
+            highest = np.maximum.reduceat(np.where(filled, block, -np.inf), starts, axis=0)
+            lowest = np.minimum.reduceat(np.where(filled, block, np.inf), starts, axis=0)
+            has_values = self.count[by_start, columns] > 0
+            self.max[by_start, columns] = np.where(has_values, highest, np.nan)
+            self.min[by_start, columns] = np.where(has_values, lowest, np.nan)
+            part_filled = np.logical_or.reduceat(filled[by_part], runs, axis=0)
+            self.parts[nonempty, columns] = np.add.reduceat(part_filled, run_starts, axis=0)
+            part_above = np.logical_or.reduceat(above[by_part], runs, axis=0)
+            self.critical_parts[nonempty, columns] = np.add.reduceat(part_above, run_starts, axis=0)
+
+            hit = above.any(axis=1) & (first_week == n_weeks)
+            first_week[hit] = start + above[hit].argmax(axis=1)
+
+        # Earliest critical week of every part across all projects
+        part_first = pd.Series(first_week).groupby(materials).min().to_numpy()
+        self.first_critical = np.bincount(part_first, minlength=n_weeks + 1)[:n_weeks]
+
+    def metrics(self, frozen_weeks=FROZEN_WEEKS):
+        # The four metric cards for the first ``frozen_weeks`` weeks
+        critical = self.critical[:, :frozen_weeks]
+        if not critical.any():
+            return empty_metrics()
+        return {
+            'critical_parts': int(self.first_critical[:frozen_weeks].sum()),
+            'projects_affected': int(critical.any(axis=1).sum()),
+            'highest_fluctuation': float(np.nanmax(self.max[:, :frozen_weeks])),
+            'affected_weeks': int(critical.any(axis=0).sum()),
+        }
+
+    def frame(self, field, projects=None, weeks=None):
+        # One aggregate as a (project x week) DataFrame; unassigned rows are left out
+        projects = [p for p in self.groups if p is not None] if projects is None else list(projects)
+        rows = [self._positions[p] for p in projects]
+        n_weeks = len(self.weeks) if weeks is None else weeks
+        return pd.DataFrame(
+            getattr(self, field)[rows, :n_weeks],
+            index=pd.Index(projects, name='Production line'),
+            columns=pd.Index(self.weeks[:n_weeks], name='Week'),
+        )
+
+    def overview(self):
+        # Long format of all aggregates of the named projects, for the overview chart
+        fields = {'count': 'Values', 'parts': 'Parts', 'critical': 'Critical cells', 'max': 'Max', 'min': 'Min'}
+        frames = [self.frame(field).stack(future_stack=True).rename(name) for field, name in fields.items()]
+        return pd.concat(frames, axis=1).reset_index()
+
+
+class SheetIndex:
+    """Per-sheet structures built once when a sheet is loaded.
+
+    Rows are grouped by project so that each project's identifier rows and week
+    matrix are contiguous slices; project_frame and project_matrix return views
+    of them rather than copies. Critical cells are memoized per project and per
+    (threshold, frozen weeks) setting, so switching projects is a lookup and a
+    refreshed sheet only recomputes the projects whose rows changed.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.wk_cols = week_columns(df)
+
+        codes, projects = pd.factorize(df['Production line'], sort=True)
+        self.order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[self.order]
+        starts = np.searchsorted(sorted_codes, np.arange(len(projects)), side='left')
+        stops = np.searchsorted(sorted_codes, np.arange(len(projects)), side='right')
+        self.projects = list(projects)
+        self._slices = {
+            project: slice(int(start), int(stop))
+            for project, start, stop in zip(self.projects, starts, stops)
+        }
+        # Rows without a project (code -1) sort first; they count for the
+        # all-project analysis but are never selectable
+        self._groups = dict(self._slices)
+        n_unassigned = int(np.searchsorted(sorted_codes, 0))
+        if n_unassigned:
+            self._groups[None] = slice(0, n_unassigned)
+
+        # Identifier columns and week matrix in project order
+        self.ids = df[[col for col in ID_COLUMNS if col in df.columns]].take(self.order)
+        self.matrix = week_matrix(df, self.wk_cols, self.order)
+        self._cells = {}
+        self._critical = {}
+        self._fingerprints = None
+
+        # Project x week aggregates behind the metric cards and overview charts
+        self.material_codes, self.materials = pd.factorize(self.ids['Material'], use_na_sentinel=False)
+        self._cubes = {}
+        self.cube(CRITICAL_THRESHOLD)
+
+    def __len__(self):
+        return len(self.df)
+
+    def project_slice(self, project):
+        return self._slices.get(project, slice(0, 0))
+
+    @property
+    def nbytes(self):
+        # Memory held by the sheet and the index structures
+        return int(
+            self.df.memory_usage(index=True, deep=True).sum()
+            + self.ids.memory_usage(index=True, deep=False).sum()
+            + self.matrix.nbytes + self.order.nbytes
+        )
+
+    def project_frame(self, project):
+        # Identifier columns of one project; pair with project_matrix for the weeks
+        return self.ids.iloc[self.project_slice(project)]
+
+    def project_matrix(self, project):
+        return self.matrix[self.project_slice(project)]
+
+    def project_long(self, project):
+        return long_format(self.project_frame(project), self.wk_cols, self.project_matrix(project))
+
+    def project_cells(self, project, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+        # Critical cells of one project as (row within the project, week, value)
+        per_project = self._cells.setdefault((threshold, frozen_weeks), {})
+        cells = per_project.get(project)
+        if cells is None:
+            cells = critical_cells(self.matrix[self._groups[project], :frozen_weeks], threshold)
+            per_project[project] = cells
+        return cells
+
+    def critical(self, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+        key = (threshold, frozen_weeks)
+        result = self._critical.get(key)
+        if result is None:
+            rows, weeks, values = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)], [np.empty(0, self.matrix.dtype)]
+            for project, rows_slice in self._groups.items():
+                local_rows, week_idx, cell_values = self.project_cells(project, threshold, frozen_weeks)
+                rows.append(self.order[rows_slice.start + local_rows])
+                weeks.append(week_idx)
+                values.append(cell_values)
+            row_idx, week_idx, values = np.concatenate(rows), np.concatenate(weeks), np.concatenate(values)
+
+            # Back to week-major sheet order, so results match critical_parts(df)
+            order = np.lexsort((row_idx, week_idx))
+            result = build_critical(
+                self.df, self.wk_cols[:frozen_weeks], row_idx[order], week_idx[order], values[order]
+            )
+            self._critical[key] = result
+        return result
+
+    def cube(self, threshold=CRITICAL_THRESHOLD):
+        # WeekCube of this sheet; the default threshold's is built with the index
+        cube = self._cubes.get(threshold)
+        if cube is None:
+            cube = WeekCube(self.matrix, self._groups, self.material_codes, self.wk_cols, threshold)
+            self._cubes[threshold] = cube
+        return cube
+
+    def metrics(self, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+        # Same values as critical(...).metrics, read from the cube
+        return self.cube(threshold).metrics(frozen_weeks)
+
+    def project_week_heatmap(self, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+        # (project x frozen week) highest critical fluctuation and number of
+        # distinct critical parts, read from the cube. NaN where a project has
+        # no critical part that week.
+        cube = self.cube(threshold)
+        counts = cube.frame('critical_parts', self.projects, frozen_weeks)
+        peaks = cube.frame('max', self.projects, frozen_weeks).astype(float).where(counts > 0)
+        return peaks, counts
+
+    def project_critical_rows(self, project, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+        # Critical parts of one project, most volatile first: (materials,
+        # frozen-zone values) for drilling down from the project heatmap
+        rows = self.project_slice(project)
+        frozen = self.matrix[rows, :frozen_weeks]
+        if not frozen.shape[1]:
+            return np.empty(0, dtype=object), frozen
+        peak = np.where(np.isnan(frozen), -np.inf, frozen).max(axis=1)
+        keep = np.flatnonzero(peak > frozen.dtype.type(threshold))
+        keep = keep[np.argsort(-peak[keep], kind='stable')]
+        return column_take(self.ids['Material'], rows.start + keep), frozen[keep]
+
+    def threshold_sweep(self, thresholds, frozen_lengths):
+        # What-if analysis over every (threshold, frozen-zone length) pair in
+        # one broadcast pass: each row's running maximum over the weeks gives
+        # its peak for every frozen length at once, peaks are reduced per part
+        # and per project, and compared against all thresholds together.
+        thresholds = np.asarray(sorted(set(thresholds)), dtype=self.matrix.dtype)
+        frozen_lengths = sorted({int(f) for f in frozen_lengths if 0 < int(f) <= len(self.wk_cols)})
+        columns = ['Threshold', 'Frozen weeks', 'Critical parts', 'Projects affected',
+                   'Worst part', 'Worst fluctuation']
+        if not len(thresholds) or not frozen_lengths or not len(self.df):
+            return pd.DataFrame(columns=columns)
+
+        window = self.matrix[:, :max(frozen_lengths)]
+        running = np.maximum.accumulate(np.where(np.isnan(window), -np.inf, window), axis=1)
+        row_peaks = running[:, np.asarray(frozen_lengths) - 1]            # rows x F
+
+        # Part-level peaks (a part listed twice counts once, as in the metrics)
+        materials = self.materials
+        part_peaks = pd.DataFrame(row_peaks).groupby(self.material_codes).max().to_numpy()  # parts x F
+        starts = np.array([rows.start for rows in self._groups.values()])
+        group_order = np.argsort(starts)
+        project_peaks = np.maximum.reduceat(row_peaks, starts[group_order], axis=0)  # projects x F
+
+        critical_parts = (part_peaks[:, :, None] > thresholds).sum(axis=0)         # F x T
+        projects_affected = (project_peaks[:, :, None] > thresholds).sum(axis=0)   # F x T
+        worst = part_peaks.argmax(axis=0)
+        worst_value = part_peaks[worst, np.arange(len(frozen_lengths))]
+
+        records = []
+        for f, frozen in enumerate(frozen_lengths):
+            for t, threshold in enumerate(thresholds):
+                hit = worst_value[f] > threshold
+                records.append((
+                    float(threshold), frozen, int(critical_parts[f, t]), int(projects_affected[f, t]),
+                    materials[worst[f]] if hit else None, float(worst_value[f]) if hit else np.nan,
+                ))
+        return pd.DataFrame.from_records(records, columns=columns)
+
+    def fingerprints(self):
+        # Project -> hash of its rows (identifiers and weeks), to detect which projects changed
+        if self._fingerprints is None:
+            columns = [col for col in ID_COLUMNS if col in self.df.columns] + self.wk_cols
+            row_hashes = pd.util.hash_pandas_object(self.df[columns], index=False).to_numpy()[self.order]
+            self._fingerprints = {
+                project: hashlib.sha1(row_hashes[rows_slice].tobytes()).hexdigest()
+                for project, rows_slice in self._groups.items()
+            }
+        return self._fingerprints
+
+    def refresh(self, df):
+        # Index for a new version of the same sheet. Memoized critical cells of
+        # projects whose rows are unchanged are carried over; returns the new
+        # index and the set of projects that changed (added, removed or edited).
+        new = SheetIndex(df)
+        old_prints = self.fingerprints()
+        new_prints = new.fingerprints()
+        if new.wk_cols != self.wk_cols:
+            return new, set(old_prints) | set(new_prints)
+
+        changed = {p for p in set(old_prints) | set(new_prints) if old_prints.get(p) != new_prints.get(p)}
+        for key, per_project in self._cells.items():
+            kept = {p: cells for p, cells in per_project.items() if p not in changed}
+            new._cells[key] = kept
+        return new, changed
+
+
+def project_summary(critical_data):
+    # Per-project metrics over the long-format critical rows
+    columns = ['Production line', 'critical_parts', 'highest_fluctuation', 'affected_weeks']
+    if critical_data.empty:
+        return pd.DataFrame(columns=columns)
+    grouped = critical_data.groupby('Production line', sort=True)
+    summary = pd.DataFrame({
+        'critical_parts': grouped['Material'].nunique(),
+        'highest_fluctuation': grouped['Fluctuation'].max(),
+        'affected_weeks': grouped['Week'].nunique(),
+    }).reset_index()
+    return summary[columns]
@@ -0,0 +1,209 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from fluctuation import CRITICAL_THRESHOLD, FROZEN_WEEKS
+
+# Local history of analyzed sheets in an embedded SQLite database. Every
+# snapshot stores one row per (project, material) with the part's highest
+# frozen-zone fluctuation, so a part can be followed across weekly planning
+# files and newly critical parts found by comparing two snapshots.
+#
+# Queries only ever touch the snapshots involved: the primary key
+# (snapshot_id, project, material) serves the snapshot-to-snapshot join and
+# parts_by_material serves trend lookups, so both stay fast with a year of
+# snapshots stored. Set FLUX_HISTORY_DB to choose the file.
+#
+# Snapshots belong to a series (a plant or planning file, by default the
+# workbook's file name): one database can be shared by several users, so
+# two workbooks that both have a "Sheet1" are neither replaced by nor
+# compared with each other.
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser('~'), '.fluxanalyzer', 'history.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    snapshot_date TEXT NOT NULL,
+    series TEXT NOT NULL DEFAULT '',
+    sheet TEXT NOT NULL,
+    source TEXT,
+    digest TEXT,
+    threshold REAL NOT NULL,
+    frozen_weeks INTEGER NOT NULL,
+    parts INTEGER NOT NULL,
+    critical_parts INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (series, sheet, snapshot_date)
+);
+CREATE TABLE IF NOT EXISTS parts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    project TEXT NOT NULL,
+    material TEXT NOT NULL,
+    fluctuation REAL,
+    critical INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, project, material)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS parts_by_material ON parts (material, project, snapshot_id);
+CREATE INDEX IF NOT EXISTS snapshots_by_sheet ON snapshots (series, sheet, snapshot_date);
+"""
+
+
+def history_db_path():
+    return os.environ.get('FLUX_HISTORY_DB', DEFAULT_DB_PATH)
+
+
+def part_maxima(sheet_index, threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS):
+    # One row per (project, material): highest frozen-zone fluctuation and
+    # whether it is above ``threshold``, computed on the index's week matrix
+    frozen = sheet_index.matrix[:, :frozen_weeks]
+    filled = np.where(np.isnan(frozen), -np.inf, frozen)
+    highest = filled.max(axis=1) if frozen.shape[1] else np.full(len(frozen), -np.inf, dtype=frozen.dtype)
+
+    projects = sheet_index.ids['Production line'].astype(object)
+    parts = pd.DataFrame({
+        'project': projects.where(projects.notna(), '').astype(str).to_numpy(),
+        'material': sheet_index.ids['Material'].astype(object).astype(str).to_numpy(),
+        'fluctuation': highest,
+    })
+    # A part listed twice in one project keeps its highest value
+    parts = parts.groupby(['project', 'material'], sort=False, as_index=False)['fluctuation'].max()
+    parts['critical'] = parts['fluctuation'].to_numpy(dtype=sheet_index.matrix.dtype) > np.float32(threshold)
+    parts['fluctuation'] = parts['fluctuation'].replace(-np.inf, np.nan)
+    return parts
+
+
+class HistoryStore:
+    def __init__(self, path=None):
+        self.path = path or history_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # A connection per call, so the store can be used from any thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def find_snapshot(self, sheet, snapshot_date, digest=None, threshold=CRITICAL_THRESHOLD,
+                      frozen_weeks=FROZEN_WEEKS, series=''):
+        # Id of a stored snapshot of exactly this content and settings, else None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, digest, threshold, frozen_weeks FROM snapshots "
+                "WHERE series = ? AND sheet = ? AND snapshot_date = ?",
+                (series, sheet, _date_text(snapshot_date)),
+            ).fetchone()
+        if row and row[1] == digest and row[2] == threshold and row[3] == frozen_weeks:
+            return row[0]
+        return None
+
+    def save_snapshot(self, sheet_index, sheet, snapshot_date=None, source=None, digest=None,
+                      threshold=CRITICAL_THRESHOLD, frozen_weeks=FROZEN_WEEKS, series=None):
+        # Stores the sheet as the snapshot of ``snapshot_date`` (default today),
+        # replacing an earlier one of the same series, sheet and date. The
+        # series defaults to ``source``. Returns its id.
+        snapshot_date = _date_text(snapshot_date or date.today())
+        series = series or source or ''
+        existing = self.find_snapshot(sheet, snapshot_date, digest, threshold, frozen_weeks, series)
+        if existing is not None and digest is not None:
+            return existing
+
+        parts = part_maxima(sheet_index, threshold, frozen_weeks)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM snapshots WHERE series = ? AND sheet = ? AND snapshot_date = ?",
+                (series, sheet, snapshot_date),
+            )
+            cursor = conn.execute(
+                "INSERT INTO snapshots (snapshot_date, series, sheet, source, digest, threshold, frozen_weeks, "
+                "parts, critical_parts, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (snapshot_date, series, sheet, source, digest, threshold, frozen_weeks, len(parts),
+                 int(parts['critical'].sum()), datetime.now().isoformat(timespec='seconds')),
+            )
+            snapshot_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO parts (snapshot_id, project, material, fluctuation, critical) VALUES (?, ?, ?, ?, ?)",
+                zip(
+                    [snapshot_id] * len(parts),
+                    parts['project'].tolist(),
+                    parts['material'].tolist(),
+                    [None if v != v else v for v in parts['fluctuation'].tolist()],
+                    parts['critical'].astype(int).tolist(),
+                ),
+            )
+        return snapshot_id
+
+    def snapshots(self, sheet=None, series=None):
+        conditions, params = [], []
+        if sheet is not None:
+            conditions.append("sheet = ?")
+            params.append(sheet)
+        if series is not None:
+            conditions.append("series = ?")
+            params.append(series)
+        query = ("SELECT id, snapshot_date, series, sheet, source, parts, critical_parts FROM snapshots"
+                 + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                 + " ORDER BY snapshot_date, series, sheet")
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(query, conn, params=params or None)
+
+    def previous_snapshot(self, snapshot_id):
+        # Latest earlier snapshot of the same series and sheet, else None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT prev.id FROM snapshots cur JOIN snapshots prev "
+                "ON prev.series = cur.series AND prev.sheet = cur.sheet AND prev.snapshot_date < cur.snapshot_date "
+                "WHERE cur.id = ? ORDER BY prev.snapshot_date DESC LIMIT 1",
+                (snapshot_id,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def newly_critical(self, snapshot_id, previous_id=None):
+        # Parts critical in ``snapshot_id`` that were not critical (or not
+        # present) in ``previous_id`` (default: the previous snapshot)
+        if previous_id is None:
+            previous_id = self.previous_snapshot(snapshot_id)
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(
+                "SELECT cur.project AS 'Production line', cur.material AS Material, "
+                "cur.fluctuation AS Fluctuation, prev.fluctuation AS 'Previous fluctuation' "
+                "FROM parts cur LEFT JOIN parts prev "
+                "ON prev.snapshot_id = ? AND prev.project = cur.project AND prev.material = cur.material "
+                "WHERE cur.snapshot_id = ? AND cur.critical = 1 AND COALESCE(prev.critical, 0) = 0 "
+                "ORDER BY cur.fluctuation DESC",
+                conn, params=(previous_id if previous_id is not None else -1, snapshot_id),
+            )
+
+    def part_trend(self, material, project=None, sheet=None, series=None):
+        # Highest frozen-zone fluctuation of one part in every snapshot that has it
+        query = (
+            "SELECT s.snapshot_date AS 'Snapshot date', s.sheet AS Sheet, p.project AS 'Production line', "
+            "p.fluctuation AS Fluctuation, p.critical AS Critical "
+            "FROM parts p JOIN snapshots s ON s.id = p.snapshot_id WHERE p.material = ?"
+        )
+        params = [str(material)]
+        if project is not None:
+            query += " AND p.project = ?"
+            params.append(str(project))
+        if sheet is not None:
+            query += " AND s.sheet = ?"
+            params.append(sheet)
+        if series is not None:
+            query += " AND s.series = ?"
+            params.append(series)
+        query += " ORDER BY s.snapshot_date"
+        with closing(self._connect()) as conn:
+            trend = pd.read_sql_query(query, conn, params=params)
+        trend['Critical'] = trend['Critical'].astype(bool)
+        return trend
+
+
+def _date_text(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
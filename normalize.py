@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Normalization of the value columns (wk* and 'Deficit quantity') of a sheet
+# as read by excel_reader. Real files mix numeric cells, "12%" text, decimal
+# commas ("0,12"), blanks and stray text in the same column. The format of
+# each column is inferred once from a sample of its cells and kept per
+# (workbook digest, sheet), so re-reading the same file skips the inference.
+# Whole columns are then converted with pandas' vectorized to_numeric and
+# string kernels; only cells that were not plain numbers go through the
+# string pass. Cells that still do not parse become NaN and are reported.
+
+SAMPLE_SIZE = 2000
+MAX_EXAMPLES = 20
+SCHEMA_CACHE_SIZE = 64
+VALUE_COLUMNS = ['Deficit quantity']
+
+_schemas = OrderedDict()
+_schemas_lock = threading.Lock()
+
+
+def value_columns(columns):
+    return [col for col in columns if col in VALUE_COLUMNS or str(col).lower().startswith('wk')]
+
+
+def holds_text(series):
+    # Object or (pandas 3) str dtype: an all-text column is inferred as str
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def infer_format(values, sample_size=SAMPLE_SIZE):
+    # {'decimal_comma': ...} of one object column, from ``sample_size``
+    # evenly spaced cells
+    positions = np.linspace(0, len(values) - 1, min(len(values), sample_size)).astype(int)
+    sample = [v for v in values[positions] if v is not None and v == v]
+    text = pd.Series([v.strip() for v in sample if isinstance(v, str)], dtype=object)
+    text = text[text != '']
+    number = text.str.removesuffix('%').str.strip()
+    thousands = number.str.fullmatch(r'-?[1-9]\d{0,2}(,\d{3})+')
+    comma_decimals = (number.str.fullmatch(r'-?\d*,\d+') & ~thousands).sum()
+    dot_decimals = number.str.fullmatch(r'-?\d*\.\d+').sum()
+    return {
+        # "0,12" is a decimal comma unless the column also writes "0.12";
+        # otherwise commas are thousands separators ("1,250" is read as such)
+        'decimal_comma': bool(comma_decimals and not dot_decimals),
+    }
+
+
+def infer_schema(df, columns=None, sample_size=SAMPLE_SIZE):
+    # Format per value column that holds text; numeric columns need no entry
+    columns = value_columns(df.columns) if columns is None else columns
+    return {
+        col: infer_format(df[col].to_numpy(dtype=object), sample_size)
+        for col in columns
+        if col in df.columns and holds_text(df[col])
+    }
+
+
+def cached_schema(digest, sheet_name, df):
+    # Schema of a sheet, inferred on the first read of this workbook content
+    if digest is None:
+        return infer_schema(df)
+    key = (digest, sheet_name)
+    with _schemas_lock:
+        schema = _schemas.get(key)
+        if schema is not None:
+            _schemas.move_to_end(key)
+    if schema is None or not set(infer_targets(df)) <= set(schema):
+        schema = infer_schema(df)
+        with _schemas_lock:
+            _schemas[key] = schema
+            while len(_schemas) > SCHEMA_CACHE_SIZE:
+                _schemas.popitem(last=False)
+    return schema
+
+
+def infer_targets(df):
+    return [col for col in value_columns(df.columns) if holds_text(df[col])]
+
+
+def parse_column(values, fmt):
+    # (float64 values, mask of non-blank cells that could not be parsed)
+    series = pd.Series(values, dtype=object)
+    # Numbers and plain numeric text in one C pass; the rest is text
+    result = pd.to_numeric(series, errors='coerce').astype(float)
+    pending = (result.isna() & series.notna()).to_numpy()
+    unparsed = np.zeros(len(series), dtype=bool)
+    if not pending.any():
+        return result.to_numpy(), unparsed
+
+    text = series[pending].astype(str).str.strip()
+    is_percent = text.str.endswith('%')
+    number = text.str.removesuffix('%').str.strip()
+    if fmt.get('decimal_comma'):
+        number = number.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    else:
+        number = number.str.replace(',', '', regex=False)
+    parsed = pd.to_numeric(number, errors='coerce')
+    parsed = parsed.where(~is_percent, parsed / 100)
+
+    values_out = result.to_numpy(copy=True)
+    values_out[pending] = parsed.to_numpy(dtype=float, na_value=np.nan)
+    unparsed[pending] = (parsed.isna() & (text != '')).to_numpy()
+    return values_out, unparsed
+
+
+def normalize_frame(df, schema=None, first_row=1):
+    # ``df`` with every text-holding value column converted to float, and the
+    # unparsed-cell report: {'counts': {column: n}, 'examples': [[column, row, value], ...]}
+    # where row is the sheet row number given that frame row 0 is ``first_row``
+    schema = infer_schema(df) if schema is None else schema
+    columns = {}
+    counts = {}
+    examples = []
+    for col in infer_targets(df):
+        values, unparsed = parse_column(df[col].to_numpy(dtype=object), schema.get(col, {}))
+        columns[col] = values
+        n_unparsed = int(unparsed.sum())
+        if n_unparsed:
+            counts[col] = n_unparsed
+            raw = df[col].to_numpy(dtype=object)
+            examples.extend(
+                [col, int(first_row + i), str(raw[i])] for i in np.flatnonzero(unparsed)[:MAX_EXAMPLES]
+            )
+    if columns:
+        df = df.assign(**columns)
+    return df, {'counts': counts, 'examples': examples}
+
+
+def unparsed_cells(df):
+    # (total count, examples DataFrame) of the report attached by excel_reader.read_sheet
+    report = df.attrs.get('unparsed_cells') or {}
+    counts = report.get('counts') or {}
+    examples = pd.DataFrame(report.get('examples') or [], columns=['Column', 'Row', 'Value'])
+    return sum(counts.values()), examples
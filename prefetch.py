@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from excel_reader import read_sheet
+
+# Eager parsing of every sheet of a workbook in a process pool. The visible
+# sheet is submitted first and the rest fill in behind it; finished frames go
+# into a SheetCache, so its byte budget bounds what prefetching keeps around.
+# Workers get a file path: uploaded bytes are written to a temporary file once
+# per workbook instead of being pickled to the pool with every sheet, and the
+# file is removed when the workbook has no queued sheets left.
+
+
+def _parse_sheet(path, sheet_name, digest):
+    # Runs in a worker process
+    return read_sheet(path, sheet_name, digest=digest)
+
+
+class SheetPrefetcher:
+    def __init__(self, cache, max_workers=None):
+        self.cache = cache
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._executor = None
+        self._futures = {}
+        self._owners = {}
+        self._spooled = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Worker processes are only started once prefetching is actually used
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def prefetch(self, source, sheet_names, digest, first=None, owner=None):
+        # Queue every sheet of the workbook ``digest`` (a path or its bytes)
+        # that is neither cached nor already queued. Sheets ``owner`` (e.g. a
+        # Streamlit session) queued for other workbooks and that have not
+        # started yet are dropped, since that owner now looks at this upload;
+        # other owners' sheets are left alone.
+        order = list(sheet_names)
+        if first in order:
+            order.remove(first)
+            order.insert(0, first)
+
+        with self._lock:
+            superseded = [
+                future for key, future in self._futures.items()
+                if key[0] != digest and self._owners.get(key) == owner
+            ]
+            for sheet_name in order:
+                key = (digest, sheet_name)
+                if key in self._futures or key in self.cache:
+                    continue
+                path = self._path(source, digest)
+                future = self._pool().submit(_parse_sheet, path, sheet_name, digest)
+                self._futures[key] = future
+                self._owners[key] = owner
+                future.add_done_callback(lambda f, key=key: self._store(key, f))
+        # Cancelling runs the done callback, which takes the lock
+        for future in superseded:
+            future.cancel()
+
+    def _path(self, source, digest):
+        # Called with the lock held
+        if not isinstance(source, (bytes, bytearray)):
+            return source
+        path = self._spooled.get(digest)
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="flux-prefetch-", suffix=".xlsx")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(source)
+            self._spooled[digest] = path
+        return path
+
+    def _store(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+                del self._owners[key]
+            done = not any(queued[0] == key[0] for queued in self._futures)
+            path = self._spooled.pop(key[0], None) if done else None
+        if path is not None:
+            _remove(path)
+        if future.cancelled() or future.exception() is not None:
+            # The foreground load parses the sheet itself and reports the error
+            return
+        self.cache.put(key[0], key[1], future.result())
+
+    def pending(self, digest, sheet_name):
+        with self._lock:
+            return (digest, sheet_name) in self._futures
+
+    def wait(self, digest, sheet_name, cancelled=None, poll=0.2):
+        # Parsed frame of a prefetched sheet, waiting for it if it is still being
+        # parsed. None if it was never queued or failed; ``cancelled()`` is
+        # polled so a waiting background job can still be abandoned.
+        while True:
+            df = self.cache.get(digest, sheet_name)
+            if df is not None:
+                return df
+            with self._lock:
+                future = self._futures.get((digest, sheet_name))
+            if future is None:
+                # The done callback may have just stored it
+                return self.cache.get(digest, sheet_name)
+            if cancelled is not None and cancelled():
+                return None
+            try:
+                if future.exception(timeout=poll) is None:
+                    return future.result()
+                return None
+            except FuturesTimeout:
+                continue
+            except CancelledError:
+                return None
+
+    def shutdown(self):
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+            self._owners.clear()
+            paths = list(self._spooled.values())
+            self._spooled.clear()
+        for future in futures:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for path in paths:
+            _remove(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Lightweight stage timing for both frontends. Each StageTimer collects spans
+# (name, wall time, row count, RSS delta) for one run of a pipeline; flush()
+# appends them as JSON lines to a shared log so timings can be aggregated
+# across users. Set FLUX_TIMING_LOG to choose the file, or to "" to disable.
+
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser('~'), '.fluxanalyzer', 'timings.jsonl')
+SESSION_ID = uuid.uuid4().hex[:12]
+
+_log_lock = threading.Lock()
+
+
+def timing_log_path():
+    return os.environ.get('FLUX_TIMING_LOG', DEFAULT_LOG_PATH) or None
+
+
+def current_rss():
+    # Resident set size in bytes, or None where it cannot be read cheaply
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class StageTimer:
+    def __init__(self, frontend, **context):
+        self.frontend = frontend
+        self.context = context
+        self.spans = []
+
+    @contextmanager
+    def span(self, name, rows=None, **extra):
+        # The yielded dict can be updated inside the block, e.g. span['rows'] = len(df)
+        record = {'stage': name, 'rows': rows, **extra}
+        rss_before = current_rss()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            rss_after = current_rss()
+            if rss_before is not None and rss_after is not None:
+                record['memory_delta_bytes'] = rss_after - rss_before
+            else:
+                record['memory_delta_bytes'] = None
+            self.spans.append(record)
+
+    @property
+    def total_seconds(self):
+        return sum(span['seconds'] for span in self.spans)
+
+    def rows(self):
+        # Spans formatted for display in a table
+        return [
+            {
+                'Stage': span['stage'],
+                'Time (ms)': round(span['seconds'] * 1000, 1),
+                'Rows': span['rows'],
+                'Memory Δ (MB)': (
+                    round(span['memory_delta_bytes'] / 1e6, 1)
+                    if span['memory_delta_bytes'] is not None else None
+                ),
+            }
+            for span in self.spans
+        ]
+
+    def flush(self, path=None):
+        # Append collected spans to the JSON lines log and start over
+        path = path or timing_log_path()
+        spans, self.spans = self.spans, []
+        if not path or not spans:
+            return spans
+        timestamp = datetime.now().isoformat(timespec='milliseconds')
+        lines = [
+            json.dumps({
+                'timestamp': timestamp,
+                'session': SESSION_ID,
+                'frontend': self.frontend,
+                **self.context,
+                **span,
+            }, default=str)
+            for span in spans
+        ]
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with _log_lock, open(path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError:
+            # Timing must never break the dashboard
+            pass
+        return spans
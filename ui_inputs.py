@@ -0,0 +1,16 @@
+# Parsing of free-text inputs shared by the Streamlit and desktop front ends,
+# kept free of heavy imports like chart_modes.py.
+
+
+def parse_values(text, cast=float):
+    # "0.1, 0.15, 20%" -> [0.1, 0.15, 0.2]; entries that do not parse are skipped
+    values = []
+    for item in str(text).replace(';', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            values.append(cast(float(item[:-1]) / 100 if item.endswith('%') else float(item)))
+        except ValueError:
+            continue
+    return values
@@ -0,0 +1,81 @@
+import hashlib
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Per-sheet change detection for .xlsx/.xlsm files without parsing any cells.
+# A workbook is a zip; each worksheet is its own XML part. Hashing the parts
+# tells which sheets changed between two saves of the same file.
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+SHARED_STRINGS = 'xl/sharedStrings.xml'
+SHARED_STRING_MARKER = b't="s"'
+BLOCK_SIZE = 1 << 20
+
+
+def sheet_parts(zf):
+    # Sheet name -> zip member name, from workbook.xml and its relationships
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels.iter(f'{{{PKG_REL_NS}}}Relationship'):
+        target = rel.get('Target')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = target
+
+    parts = {}
+    for sheet in workbook.iter(f'{{{MAIN_NS}}}sheet'):
+        target = targets.get(sheet.get(f'{{{REL_NS}}}id'))
+        if target:
+            parts[sheet.get('name')] = target
+    return parts
+
+
+def _hash_member(zf, name):
+    # (sha1 hex digest, whether the part references the shared strings table)
+    digest = hashlib.sha1()
+    uses_shared = False
+    tail = b''
+    with zf.open(name) as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+            if not uses_shared:
+                # Keep a few bytes of overlap so the marker is found across block edges
+                uses_shared = SHARED_STRING_MARKER in tail + block
+                tail = block[-len(SHARED_STRING_MARKER):]
+    return digest.hexdigest(), uses_shared
+
+
+def sheet_part_hashes(path):
+    # Sheet name -> content hash. Sheets whose cells point into the shared
+    # strings table also fold in that table's hash, since a change there can
+    # change their text without touching the sheet part itself.
+    with zipfile.ZipFile(path) as zf:
+        parts = sheet_parts(zf)
+        shared_hash = None
+        if SHARED_STRINGS in zf.namelist():
+            shared_hash, _ = _hash_member(zf, SHARED_STRINGS)
+
+        hashes = {}
+        for sheet, member in parts.items():
+            digest, uses_shared = _hash_member(zf, member)
+            if uses_shared and shared_hash:
+                digest = hashlib.sha1(f"{digest}:{shared_hash}".encode('ascii')).hexdigest()
+            hashes[sheet] = digest
+    return hashes
+
+
+def changed_sheets(old_hashes, new_hashes):
+    # Sheets that were added or whose content changed, in workbook order
+    return [name for name, digest in new_hashes.items() if old_hashes.get(name) != digest]
+
+
+def workbook_version(hashes):
+    # One digest for the whole workbook state, from its per-sheet hashes
+    joined = '\n'.join(f"{name}\t{digest}" for name, digest in hashes.items())
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()